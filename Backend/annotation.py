@@ -0,0 +1,129 @@
+"""
+Drawing and writing annotated detection images.
+Renders boxes from stored detections so annotation does not need the
+model's result objects and can happen long after inference. Renders can be
+downscaled and written as JPEG or WebP, which encode far faster and produce
+much smaller files than full-resolution PNG.
+"""
+
+import io
+import os
+import uuid
+from typing import NamedTuple
+
+import numpy as np
+
+# Output format -> file extension
+ANNOTATED_EXTENSIONS = {"png": ".png", "jpeg": ".jpg", "webp": ".webp"}
+PNG_COMPRESSION = 1  # Fastest zlib level; PNG stays lossless either way
+
+
+class AnnotationOptions(NamedTuple):
+    """How an annotated render is encoded (hashable, so usable in batch keys)"""
+
+    format: str = "jpeg"
+    quality: int = 85
+    max_dim: int = 0  # Longest side in pixels, 0 keeps the original size
+    thumbnail_max_dim: int = 0  # Also produce a thumbnail this size, 0 for none
+
+    @property
+    def extension(self) -> str:
+        return ANNOTATED_EXTENSIONS[self.format]
+
+    @property
+    def tag(self) -> str:
+        """Short filename-safe description, e.g. jpeg85-1920"""
+        quality = "" if self.format == "png" else str(self.quality)
+        return f"{self.format}{quality}-{self.max_dim or 'full'}"
+
+    def thumbnail(self) -> "AnnotationOptions":
+        """Options for the thumbnail variant of the same render"""
+        return self._replace(max_dim=self.thumbnail_max_dim, thumbnail_max_dim=0)
+
+
+def fit_image(image: np.ndarray, detections: np.ndarray, max_dim: int):
+    """Downscale an image so its longest side is at most max_dim, scaling boxes to match"""
+    height, width = image.shape[:2]
+    if not max_dim or max(height, width) <= max_dim:
+        return image, detections
+    import cv2
+    scale = max_dim / max(height, width)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    resized = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    scaled = detections.copy()
+    scaled[:, 2:6] *= scale
+    return resized, scaled
+
+
+def hex_to_bgr(color: str) -> tuple:
+    color = color.lstrip("#")
+    r, g, b = (int(color[i:i + 2], 16) for i in (0, 2, 4))
+    return (b, g, r)
+
+
+def render_detections(image: np.ndarray, detections: np.ndarray, class_names: dict, class_colors: dict) -> np.ndarray:
+    """Return a copy of a BGR image with boxes and labels drawn on it.
+
+    `detections` is an (N, 6) array of class_id, confidence, x1, y1, x2, y2.
+    """
+    import cv2
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    annotated = image.copy()
+    height, width = annotated.shape[:2]
+    thickness = max(2, round((height + width) / 2 * 0.003))
+    font_scale = max(0.4, thickness / 4)
+
+    for cls_id, confidence, *bbox in detections.tolist():
+        cls_id = int(cls_id)
+        name = class_names.get(cls_id, f"Class_{cls_id}")
+        color = hex_to_bgr(class_colors.get(name, "#FFFFFF"))
+        x1, y1, x2, y2 = (int(v) for v in bbox)
+        cv2.rectangle(annotated, (x1, y1), (x2, y2), color, thickness, cv2.LINE_AA)
+
+        label = f"{name} {confidence:.2f}"
+        (text_w, text_h), baseline = cv2.getTextSize(label, font, font_scale, 1)
+        label_top = max(0, y1 - text_h - baseline - 4)
+        cv2.rectangle(annotated, (x1, label_top), (x1 + text_w + 4, label_top + text_h + baseline + 4), color, -1)
+        # Dark text on light label backgrounds, white otherwise
+        text_color = (0, 0, 0) if sum(color) > 382 else (255, 255, 255)
+        cv2.putText(annotated, label, (x1 + 2, label_top + text_h + 2), font, font_scale,
+                    text_color, 1, cv2.LINE_AA)
+    return annotated
+
+
+def encode_params(options: AnnotationOptions) -> list:
+    import cv2
+    if options.format == "jpeg":
+        return [cv2.IMWRITE_JPEG_QUALITY, int(options.quality)]
+    if options.format == "webp":
+        return [cv2.IMWRITE_WEBP_QUALITY, int(options.quality)]
+    return [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESSION]
+
+
+def write_image(path: str, image: np.ndarray, options: AnnotationOptions = None):
+    """Write a BGR image to disk, falling back to PIL if cv2 cannot.
+
+    The file is encoded in memory and renamed into place, so a concurrent
+    download never sees a partly written render.
+    """
+    import cv2
+    options = options or AnnotationOptions(format="png")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    try:
+        success, encoded = cv2.imencode(options.extension, image, encode_params(options))
+        data = encoded.tobytes() if success else None
+    except Exception as e:
+        print(f"cv2 encode failed, trying PIL: {e}")
+        data = None
+    if data is None:
+        from PIL import Image
+        img_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        pil_format = {"jpeg": "JPEG", "webp": "WEBP", "png": "PNG"}[options.format]
+        save_args = {} if options.format == "png" else {"quality": int(options.quality)}
+        buffer = io.BytesIO()
+        Image.fromarray(img_rgb).save(buffer, format=pil_format, **save_args)
+        data = buffer.getvalue()
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
@@ -1,24 +1,58 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Request
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
-from ultralytics import YOLO
-import cv2
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
 import numpy as np
 import os
-import shutil
 from pathlib import Path
 import uvicorn
-from typing import List
+from typing import List, Optional
+import asyncio
+import functools
+import io
 import json
 from datetime import datetime
-from PIL import Image as PILImage
-
-app = FastAPI(title="Safety Equipment Detection API")
+from config import (
+    MAX_INFERENCE_BATCH, SAVE_UPLOADS,
+    INFERENCE_WORKERS, INFERENCE_QUEUE_DEPTH, INFERENCE_RETRY_AFTER_S,
+    INFERENCE_PROCESSES, INFERENCE_THREADS_PER_PROCESS,
+    SINGLE_BATCH_MAX_SIZE, SINGLE_BATCH_MAX_WAIT_MS,
+    RESULT_CACHE_MAX_MB, RESULT_CACHE_DB,
+    NEAR_DUPLICATE_REUSE, NEAR_DUPLICATE_MAX_DISTANCE, NEAR_DUPLICATE_INDEX_SIZE,
+    TILE_SIZE, TILE_OVERLAP, TILE_BATCH_SIZE, TILE_FULL_IMAGE, TILE_MERGE_THRESHOLD, TILE_MAX_TILES,
+    EAGER_ANNOTATION, PENDING_ANNOTATIONS_MAX, CLASS_COLORS,
+    ANNOTATED_FORMAT, ANNOTATED_QUALITY, ANNOTATED_MAX_DIM, THUMBNAIL_MAX_DIM,
+    MODEL_PATH, MODEL_NAME, MODEL_METRICS,
+    MODEL_BACKEND, MODEL_EXPORT_DIR, MODEL_IMGSZ, MODEL_WARMUP, MODEL_LOAD_WAIT_S,
+    JOBS_DIR, JOB_BATCH_SIZE, LOOKUP_MAX_HASHES,
+    UPLOAD_STORE_MAX_MB, UPLOAD_STORE_MAX_AGE_HOURS, UPLOAD_JANITOR_INTERVAL_S,
+    DOWNLOAD_CACHE_MAX_MB, DOWNLOAD_CACHE_MAX_FILE_KB, DOWNLOAD_MAX_AGE_S,
+    MAX_FILE_SIZE_MB, ALLOWED_EXTENSIONS,
+    VIDEO_EXTENSIONS, VIDEO_MAX_SIZE_MB, VIDEO_MAX_FRAMES, VIDEO_DEFAULT_FPS,
+)
+from executor import InferenceExecutor, QueueFullError
+from inference import run_model, prepare_model, load_model
+from worker_pool import InferenceWorkerPool
+from batcher import MicroBatcher
+from result_cache import ResultCache, content_hash, file_fingerprint
+from annotation import ANNOTATED_EXTENSIONS, AnnotationOptions, fit_image, render_detections, write_image
+from jobs import JobManager
+from upload_store import UploadStore
+from downloads import HotFileCache, serve_file
+from archive import ArchiveError, RequestBodyReader, iter_archive_members
+from video import VideoError, VideoTooLarge, VideoFrames, spool_to_tempfile, summarize_classes
+from metrics import MetricsRegistry
+from serialization import FastJSONResponse, negotiated_response, dumps_json, dumps_msgpack, msgpack
+from postprocess import format_detections, detections_to_array, empty_detections, class_counts
+from near_duplicates import NearDuplicateIndex, image_signature, hamming_distances
+from tiling import TileOptions, tile_windows, offset_detections, merge_detections
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel
+import re
+from collections import OrderedDict
+import threading
+import time
 
-# Increase FastAPI's default limits for large batch uploads
-# Default is 1000, we increase to support larger chunks
-import uvicorn.config
-uvicorn.config.LIMIT_MAX_FIELDS = 5000  # Allow up to 5000 form fields
+app = FastAPI(title="Safety Equipment Detection API", default_response_class=FastJSONResponse)
 
 # CORS middleware (allow frontend to connect)
 app.add_middleware(
@@ -29,35 +63,620 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load model
-# Change this path to where you place your downloaded model
-MODEL_PATH = "models/best.pt"  # Place your best.pt in Backend/models/ folder
-try:
-    model = YOLO(MODEL_PATH)
-except Exception as e:
-    print(f"Warning: Could not load model from {MODEL_PATH}. Error: {e}")
-    print("Please ensure your trained model (best.pt) is in the 'models/' directory")
-    model = None
-
-# Create upload directory
+# Heavy libraries (cv2, ultralytics) are imported inside the functions that
+# use them, in this module and the helper modules, so importing the app stays
+# cheap and the server answers /health before they are loaded.
+
+# Model state
+# The model is loaded and warmed up on a background thread after startup so
+# the server answers /health immediately. MODEL_PATH (config.py) points at
+# Backend/models/best.pt; MODEL_BACKEND picks PyTorch or an exported ONNX /
+# OpenVINO graph of the same weights.
+model = None
+model_file = None
+worker_pool = None
+model_fingerprint = None
+model_state = {"status": "loading", "error": None, "load_seconds": None}
+model_loaded = threading.Event()  # Set once loading finished, successfully or not
+
+
+def load_model_in_background():
+    global model, model_file, worker_pool, model_fingerprint
+    start = time.perf_counter()
+    try:
+        # Results are cached per image content, confidence, model weights and backend
+        # (hashed together, as cache keys keep only the start of the fingerprint)
+        model_fingerprint = content_hash(f"{file_fingerprint(MODEL_PATH)}:{MODEL_BACKEND}".encode())
+        model_file = prepare_model(MODEL_PATH, MODEL_BACKEND, MODEL_EXPORT_DIR, MODEL_IMGSZ)
+        if INFERENCE_PROCESSES > 0:
+            # Each worker process loads its own replica; the API process does not
+            worker_pool = InferenceWorkerPool(
+                model_file, MODEL_IMGSZ, INFERENCE_PROCESSES, INFERENCE_THREADS_PER_PROCESS,
+                MAX_INFERENCE_BATCH
+            )
+            worker_pool.start()
+        else:
+            model = load_model(model_file, MODEL_IMGSZ, warmup=MODEL_WARMUP)
+        model_state["status"] = "ready"
+        print(f"Model loaded: {model_file} ({MODEL_BACKEND} backend) in {time.perf_counter() - start:.1f}s")
+    except Exception as e:
+        print(f"Warning: Could not load model from {MODEL_PATH}. Error: {e}")
+        print("Please ensure your trained model (best.pt) is in the 'models/' directory")
+        if worker_pool is not None:
+            worker_pool.shutdown()
+        model = None
+        worker_pool = None
+        model_state["status"] = "failed"
+        model_state["error"] = str(e)
+    finally:
+        model_state["load_seconds"] = round(time.perf_counter() - start, 2)
+        model_loaded.set()
+
+
+@app.on_event("startup")
+def start_model_loading():
+    threading.Thread(target=load_model_in_background, name="model-loader", daemon=True).start()
+
+
+def model_ready() -> bool:
+    return model_state["status"] == "ready"
+
+
+def model_unavailable() -> HTTPException:
+    if model_state["status"] == "failed":
+        return HTTPException(status_code=503, detail=f"Model failed to load: {model_state['error']}")
+    return HTTPException(
+        status_code=503,
+        detail="Model is still loading",
+        headers={"Retry-After": str(INFERENCE_RETRY_AFTER_S)}
+    )
+
+
+async def require_model():
+    """Wait up to MODEL_LOAD_WAIT_S for the model, then 503 if it is not ready"""
+    deadline = time.monotonic() + MODEL_LOAD_WAIT_S
+    while model_state["status"] == "loading" and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    if not model_ready():
+        raise model_unavailable()
+
+result_cache = ResultCache(RESULT_CACHE_MAX_MB * 1024 * 1024, RESULT_CACHE_DB)
+
+# Blocking inference runs here so the event loop stays responsive
+inference_executor = InferenceExecutor(INFERENCE_WORKERS, INFERENCE_QUEUE_DEPTH)
+
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(request: Request, exc: QueueFullError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(INFERENCE_RETRY_AFTER_S)}
+    )
+
+# Pipeline metrics, served in Prometheus format by GET /metrics
+metrics = MetricsRegistry(prefix="detection_")
+metrics.histogram(
+    "stage_seconds",
+    "Per-image latency of each pipeline stage (upload_read, decode, preprocess, "
+    "inference, postprocess, tile_merge, signature, annotation_render, disk_write)"
+)
+metrics.counter("images_total", "Images processed, by result (detected, cached, near_duplicate, error)")
+metrics.counter("objects_total", "Objects detected, by class")
+metrics.counter("errors_total", "Per-image errors, by type")
+metrics.counter("lookup_hashes_total", "Hashes checked by /predict/lookup, by result (hit, miss)")
+
 UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+# Small, frequently downloaded files kept in memory
+download_cache = HotFileCache(DOWNLOAD_CACHE_MAX_MB * 1024 * 1024, DOWNLOAD_CACHE_MAX_FILE_KB * 1024)
+DOWNLOAD_CACHE_CONTROL = f"public, max-age={DOWNLOAD_MAX_AGE_S}, immutable"
+
+# Originals and annotated renders, stored by content hash
+upload_store = UploadStore(
+    UPLOAD_DIR,
+    UPLOAD_STORE_MAX_MB * 1024 * 1024,
+    UPLOAD_STORE_MAX_AGE_HOURS * 3600 if UPLOAD_STORE_MAX_AGE_HOURS else None,
+    UPLOAD_JANITOR_INTERVAL_S,
+    on_evict=download_cache.discard
+)
+
+@app.on_event("startup")
+def start_upload_janitor():
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    upload_store.start()
 
 
-def is_image_readable(path: str) -> bool:
-    """Return True if the image at `path` can be opened/verified.
-    Try PIL first (will detect truncated PNGs), fall back to cv2.
+def decode_image(data: bytes):
+    """Decode uploaded bytes into a BGR array, or return None if unreadable.
+
+    This single in-memory decode doubles as the readability check, so the
+    image is never re-opened or re-decoded from disk before inference.
     """
-    try:
-        with PILImage.open(path) as im:
-            im.verify()
-        return True
-    except Exception:
+    if not data:
+        return None
+    import cv2
+    with metrics.timer("stage_seconds", stage="decode"):
         try:
-            img = cv2.imread(path)
-            return img is not None
+            return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
         except Exception:
-            return False
+            return None
+
+
+def read_uploads(files: list) -> list:
+    """Read `(filename, file object)` pairs into `(filename, data)` pairs"""
+    uploads = []
+    for filename, handle in files:
+        with metrics.timer("stage_seconds", stage="upload_read"):
+            uploads.append((filename, handle.read()))
+    return uploads
+
+
+def save_upload(filename: str, digest: str, data: bytes) -> str:
+    """Store the original upload bytes (once per content hash) and return the path"""
+    with metrics.timer("stage_seconds", stage="disk_write"):
+        return upload_store.put_original(digest, Path(filename).suffix, data)
+
+def predict_images(images: List[np.ndarray], confidence: float, max_batch: int = MAX_INFERENCE_BATCH,
+                   timings: dict = None) -> list:
+    """Run the model over decoded images, `max_batch` at a time.
+
+    Uses the worker processes when INFERENCE_PROCESSES is set. Returns a
+    list aligned with `images` holding `(detections, None)` on success or
+    `(None, error_message)` when prediction failed for that image. Stage
+    times are recorded in the metrics and, if given, in `timings`.
+    """
+    timings = {} if timings is None else timings
+    if worker_pool is not None:
+        outputs = worker_pool.predict(images, confidence, timings, max_batch)
+    else:
+        outputs = run_model(model, images, confidence, max_batch, timings)
+    for stage, values in timings.items():
+        for seconds in values:
+            metrics.observe("stage_seconds", seconds, stage=stage)
+    return outputs
+
+
+def tiling_option(
+    tiled: bool = False,
+    tile_size: Optional[int] = None,
+    tile_overlap: Optional[float] = None,
+    tile_batch_size: Optional[int] = None
+) -> Optional[TileOptions]:
+    """Tiled inference settings for a request, or None when off"""
+    if not tiled:
+        return None
+    size = TILE_SIZE if tile_size is None else tile_size
+    overlap = TILE_OVERLAP if tile_overlap is None else tile_overlap
+    batch_size = TILE_BATCH_SIZE if tile_batch_size is None else tile_batch_size
+    if not 128 <= size <= 4096:
+        raise HTTPException(status_code=400, detail="tile_size must be between 128 and 4096")
+    if not 0 <= overlap <= 0.5:
+        raise HTTPException(status_code=400, detail="tile_overlap must be between 0 and 0.5")
+    if not 1 <= batch_size <= 256:
+        raise HTTPException(status_code=400, detail="tile_batch_size must be between 1 and 256")
+    return TileOptions(size, float(overlap), batch_size, TILE_FULL_IMAGE)
+
+
+def predict_tiled(images: List[np.ndarray], confidence: float, tiling: TileOptions, reports: list = None) -> list:
+    """predict_images over overlapping tiles, merged back into whole-image detections.
+
+    The tiles of all images (plus each whole image with full_image) go
+    through the model together, tiling.batch_size per forward pass. Returns
+    what predict_images returns for the images themselves. If `reports` is
+    given, one dict per image is appended with the tile grid and model
+    times in ms (None for images that failed). The model reports one time
+    per forward pass, split evenly over its inputs, so tile times are
+    averages, not individual measurements.
+    """
+    outputs = [None] * len(images)
+    grids = [None] * len(images)
+    crops = []
+    owners = []  # Per crop: (image index, x offset, y offset)
+    for n, image in enumerate(images):
+        height, width = image.shape[:2]
+        windows = tile_windows(height, width, tiling.size, tiling.overlap)
+        if len(windows) > TILE_MAX_TILES:
+            outputs[n] = (None, f"{len(windows)} tiles needed, more than {TILE_MAX_TILES}; use a larger tile_size")
+            continue
+        grids[n] = (len({x for x, _, _, _ in windows}), len({y for _, y, _, _ in windows}))
+        # Slices are views: tiling copies no pixels
+        crops.extend(image[y1:y2, x1:x2] for x1, y1, x2, y2 in windows)
+        owners.extend((n, x1, y1) for x1, y1, _, _ in windows)
+        if tiling.full_image and len(windows) > 1:
+            crops.append(image)
+            owners.append((n, 0, 0))
+
+    timings = {}
+    crop_outputs = predict_images(crops, confidence, tiling.batch_size, timings)
+    crop_seconds = timings.get("inference", [])
+    if len(crop_seconds) != len(crops):  # Failed crops report no time
+        crop_seconds = [None] * len(crops)
+
+    found = {}  # Image index -> (detection arrays per crop, error, model ms per crop)
+    for (n, x, y), (detections, error), seconds in zip(owners, crop_outputs, crop_seconds):
+        boxes, image_error, crop_ms = found.setdefault(n, ([], None, []))
+        crop_ms.append(round(seconds * 1000, 2) if seconds is not None else None)
+        if error is not None:
+            found[n] = (boxes, image_error or error, crop_ms)
+        else:
+            boxes.append(offset_detections(detections, x, y))
+    image_reports = [None] * len(images)
+    for n, (boxes, error, crop_ms) in found.items():
+        if error:
+            outputs[n] = (None, error)
+            continue
+        boxes = np.concatenate(boxes)
+        with metrics.timer("stage_seconds", stage="tile_merge"):
+            outputs[n] = (merge_detections(boxes, TILE_MERGE_THRESHOLD), None)
+        columns, rows = grids[n]
+        tile_ms = [ms for ms in crop_ms[:columns * rows] if ms is not None]
+        full_image = tiling.full_image and columns * rows > 1
+        image_reports[n] = {
+            "tiles": columns * rows,
+            "grid": [columns, rows],
+            "tile_size": tiling.size,
+            "overlap": tiling.overlap,
+            "batch_size": tiling.batch_size,
+            "boxes_before_merge": len(boxes),
+            "avg_tile_ms": round(sum(tile_ms) / len(tile_ms), 2) if tile_ms else None,
+            "full_image_ms": crop_ms[-1] if full_image else None,
+            "total_ms": round(sum(ms for ms in crop_ms if ms is not None), 2)
+        }
+    if reports is not None:
+        reports.extend(image_reports)
+    return outputs
+
+
+# Recently processed images by perceptual hash, for near-duplicate reuse
+near_duplicate_index = NearDuplicateIndex(NEAR_DUPLICATE_INDEX_SIZE)
+
+
+def near_duplicate_option(
+    near_duplicates: bool = NEAR_DUPLICATE_REUSE,
+    near_duplicate_distance: Optional[int] = None
+) -> Optional[int]:
+    """Maximum perceptual hash distance for reusing detections, or None when off"""
+    if not near_duplicates:
+        return None
+    distance = NEAR_DUPLICATE_MAX_DISTANCE if near_duplicate_distance is None else near_duplicate_distance
+    if not 0 <= distance <= 64:
+        raise HTTPException(status_code=400, detail="near_duplicate_distance must be between 0 and 64")
+    return distance
+
+
+def predict_with_reuse(images: List[np.ndarray], confidence: float, max_distance: Optional[int] = None,
+                       tiling: Optional[TileOptions] = None, tile_reports: list = None):
+    """predict_images (or predict_tiled), reusing the detections of near-duplicate images.
+
+    With max_distance set, an image within that many bits (dHash) of a
+    recent image - or of an earlier image in this call - with the same size,
+    model, confidence and tiling takes its detections instead of going
+    through the model. Returns `(predictions, distances)`: predictions as
+    predict_images returns them, and per image the distance to the reused
+    image, or None when the model ran. With `tiling`, `tile_reports` (if
+    given) is extended with one predict_tiled report (or None) per image.
+    """
+    def predict(subset: list):
+        if tiling is None:
+            return predict_images(subset, confidence), [None] * len(subset)
+        reports = []
+        return predict_tiled(subset, confidence, tiling, reports), reports
+
+    if max_distance is None:
+        predictions, reports = predict(images)
+        if tile_reports is not None:
+            tile_reports.extend(reports)
+        return predictions, [None] * len(images)
+
+    tiling_tag = tiling.tag if tiling is not None else None
+    contexts = [(model_fingerprint, round(float(confidence), 4), image.shape[:2], tiling_tag) for image in images]
+    with metrics.timer("stage_seconds", stage="signature"):
+        signatures = [image_signature(image) for image in images]
+    predictions = [None] * len(images)
+    distances = [None] * len(images)
+    image_reports = [None] * len(images)  # Reused images ran no tiles
+    to_predict = []  # Indexes that go through the model
+    copies = {}  # Index -> index in to_predict whose result it reuses
+
+    for i, (context, signature) in enumerate(zip(contexts, signatures)):
+        match = near_duplicate_index.find(context, signature, max_distance)
+        if match is not None:
+            predictions[i] = (match[0], None)
+            distances[i] = match[1]
+        else:
+            earlier = [j for j in to_predict if contexts[j] == context]
+            if earlier:
+                batch_distances = hamming_distances(
+                    np.array([signatures[j] for j in earlier], dtype=np.uint64), signature
+                )
+                best = int(np.argmin(batch_distances))
+                if batch_distances[best] <= max_distance:
+                    copies[i] = earlier[best]
+                    distances[i] = int(batch_distances[best])
+            if distances[i] is None:
+                to_predict.append(i)
+        near_duplicate_index.record(distances[i] is not None)
+
+    outputs, reports = predict([images[i] for i in to_predict])
+    for i, (detections, error), report in zip(to_predict, outputs, reports):
+        predictions[i] = (detections, error)
+        image_reports[i] = report
+        if error is None:
+            # Only model results are indexed, so reuse never chains away from them
+            near_duplicate_index.add(contexts[i], signatures[i], detections)
+    for i, j in copies.items():
+        predictions[i] = predictions[j]
+    if tile_reports is not None:
+        tile_reports.extend(image_reports)
+    return predictions, distances
+
+
+# Annotated images not yet rendered: annotated path -> (source path, detections, options).
+# Each is also written to the upload store as a spec file, so renders that fall
+# out of this map or outlive the process can still be drawn.
+pending_annotations = OrderedDict()
+annotation_lock = threading.Lock()  # Guards pending_annotations and render_locks
+render_locks = {}  # annotated path -> lock held while that image is drawn
+
+
+def annotation_options(
+    annotated_format: Optional[str] = None,
+    annotated_quality: Optional[int] = None,
+    annotated_max_dim: Optional[int] = None,
+    thumbnail: bool = False
+) -> AnnotationOptions:
+    """Annotated image encoding for a request, defaulting to the config settings"""
+    image_format = (annotated_format or ANNOTATED_FORMAT).lower()
+    if image_format == "jpg":
+        image_format = "jpeg"
+    if image_format not in ANNOTATED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"annotated_format must be one of: {', '.join(ANNOTATED_EXTENSIONS)}"
+        )
+    quality = ANNOTATED_QUALITY if annotated_quality is None else annotated_quality
+    if not 1 <= quality <= 100:
+        raise HTTPException(status_code=400, detail="annotated_quality must be between 1 and 100")
+    max_dim = ANNOTATED_MAX_DIM if annotated_max_dim is None else annotated_max_dim
+    if max_dim < 0:
+        raise HTTPException(status_code=400, detail="annotated_max_dim must be 0 (full size) or more")
+    return AnnotationOptions(image_format, quality, max_dim, THUMBNAIL_MAX_DIM if thumbnail else 0)
+
+
+def annotated_path_for(record: dict, confidence: float, options: AnnotationOptions, fingerprint: str = None) -> str:
+    """Annotated render path for this image content, model (and tiling), confidence and encoding"""
+    model_tag = content_hash((fingerprint or model_fingerprint).encode())[:8]  # Filename-safe on every OS
+    variant = f"{model_tag}-{round(float(confidence) * 10000):05d}-{options.tag}"
+    return upload_store.annotated_path(record["hash"], variant, options.extension)
+
+
+def schedule_annotation(annotated_path: str, source_path: str, detections: np.ndarray, options: AnnotationOptions):
+    """Remember what to draw so the image can be rendered on first download"""
+    spec = {"source": source_path, "detections": detections.tolist(), "options": options._asdict()}
+    upload_store.put_pending(annotated_path, dumps_json(spec))
+    with annotation_lock:
+        pending_annotations[annotated_path] = (source_path, detections, options)
+        pending_annotations.move_to_end(annotated_path)
+        while len(pending_annotations) > PENDING_ANNOTATIONS_MAX:
+            pending_annotations.popitem(last=False)
+
+
+def save_annotated(annotated_path: str, image: np.ndarray, detections: np.ndarray, options: AnnotationOptions) -> str:
+    """Draw detections on a decoded image and write it to annotated_path.
+
+    The image is downscaled to options.max_dim before drawing, so large
+    renders are cheaper to draw, encode and download.
+    """
+    with metrics.timer("stage_seconds", stage="annotation_render"):
+        image, detections = fit_image(image, detections, options.max_dim)
+        annotated = render_detections(image, detections, class_names, CLASS_COLORS)
+    with metrics.timer("stage_seconds", stage="disk_write"):
+        write_image(annotated_path, annotated, options)
+    upload_store.track(annotated_path)
+    return annotated_path
+
+
+def has_pending_annotation(annotated_path: str) -> bool:
+    return annotated_path in pending_annotations or os.path.exists(upload_store.pending_path(annotated_path))
+
+
+def load_pending_annotation(annotated_path: str):
+    """(source path, detections, options) for a lazy render, from memory or its spec file"""
+    with annotation_lock:
+        pending = pending_annotations.get(annotated_path)
+    if pending is not None:
+        return pending
+    data = upload_store.read_pending(annotated_path)
+    if data is None:
+        return None
+    try:
+        spec = json.loads(data)
+        return spec["source"], detections_to_array(spec["detections"]), AnnotationOptions(**spec["options"])
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"Bad render spec for {annotated_path}: {e}")
+        return None
+
+
+def render_pending_annotation(annotated_path: str) -> bool:
+    """Render a lazily scheduled annotated image; return True if it now exists"""
+    with annotation_lock:
+        lock = render_locks.setdefault(annotated_path, threading.Lock())
+    # Only requests for the same image wait for each other
+    with lock:
+        try:
+            if os.path.exists(annotated_path):
+                return True
+            pending = load_pending_annotation(annotated_path)
+            if pending is None:
+                return False
+            # Originals are stored by content hash, so the source cannot have changed
+            source_path, detections, options = pending
+            try:
+                with open(source_path, "rb") as f:
+                    data = f.read()
+            except OSError as e:
+                print(f"Cannot render {annotated_path}: {e}")
+                return False
+            image = decode_image(data)
+            if image is None:
+                return False
+            save_annotated(annotated_path, image, detections, options)
+            upload_store.discard(upload_store.pending_path(annotated_path))
+            with annotation_lock:
+                pending_annotations.pop(annotated_path, None)
+            return True
+        finally:
+            with annotation_lock:
+                render_locks.pop(annotated_path, None)
+
+
+def process_uploads(
+    uploads: list,
+    confidence: float,
+    save_original: bool = SAVE_UPLOADS,
+    annotate: bool = True,
+    eager: bool = EAGER_ANNOTATION,
+    encoding: AnnotationOptions = None,
+    reuse_distance: Optional[int] = None,
+    tiling: Optional[TileOptions] = None
+) -> list:
+    """Detect objects in uploaded images.
+
+    `uploads` is a list of `(filename, data)` pairs. Returns one record per
+    upload, in order, with keys filename, hash, detections (the (N, 6) array from
+    extract_detections), annotated_image and thumbnail_image (paths or
+    None), cached, near_duplicate, tiling (the predict_tiled report, or
+    None) and error.
+    Images already seen with the same confidence, model and tiling are
+    served from the result cache without being decoded or run through the
+    model. With `reuse_distance`, near-duplicates of recent images reuse
+    their detections (see predict_with_reuse); those results are not cached.
+    With `tiling`, images are predicted tile by tile (see predict_tiled).
+
+    Annotated images are rendered on first download unless `eager` is set;
+    lazy rendering needs the original on disk, so without `save_original`
+    only eager requests get an annotated image. `encoding` sets the render
+    format, quality, size and thumbnail (config defaults when omitted).
+    """
+    encoding = encoding or annotation_options()
+    # Tiled detections differ from whole-image ones: cache and render them apart
+    # (hashed, as cache keys keep only the start of the fingerprint)
+    fingerprint = model_fingerprint
+    if tiling is not None:
+        fingerprint = content_hash(f"{model_fingerprint}|{tiling.tag}".encode())
+    records = [None] * len(uploads)
+    pending = []  # (index, cache key, decoded image) awaiting inference
+
+    for index, (filename, data) in enumerate(uploads):
+        digest = content_hash(data)
+        source = save_upload(filename, digest, data) if save_original else None
+        record = {
+            "filename": filename,
+            "hash": digest,
+            "source": source,
+            "detections": empty_detections(),
+            "annotated_image": None,
+            "thumbnail_image": None,
+            "cached": False,
+            "near_duplicate": False,
+            "tiling": None,
+            "error": None
+        }
+        records[index] = record
+
+        key = ResultCache.make_key(digest, confidence, fingerprint)
+        entry = result_cache.get(key)
+        if entry is not None:
+            record["detections"] = detections_to_array(entry["detections"])
+            record["cached"] = True
+            metrics.inc("images_total", result="cached")
+            if annotate:
+                # Decode lazily: renders already on disk need no image
+                _annotate(record, lambda data=data: decode_image(data), eager, confidence, encoding, fingerprint)
+            continue
+
+        # Decode in memory (skip truncated/unreadable files)
+        image = decode_image(data)
+        if image is None:
+            print(f"Skipping unreadable image: {filename}")
+            record["error"] = "unreadable_image"
+            metrics.inc("images_total", result="error")
+            metrics.inc("errors_total", type="unreadable_image")
+            continue
+        pending.append((index, key, image))
+
+    # Predict all uncached images in batched forward passes
+    tile_reports = []
+    new_results = []  # (cache key, entry) for images that went through the model
+    predictions, distances = predict_with_reuse(
+        [image for _, _, image in pending], confidence, reuse_distance, tiling, tile_reports
+    )
+
+    for (index, key, image), (detections, error), distance, tile_report in zip(
+        pending, predictions, distances, tile_reports
+    ):
+        record = records[index]
+        if error is not None:
+            print(f"model.predict failed for {record['filename']}: {error}")
+            record["error"] = f"predict_error: {error}"
+            metrics.inc("images_total", result="error")
+            metrics.inc("errors_total", type="predict_error")
+            continue
+
+        record["detections"] = detections
+        record["near_duplicate"] = distance is not None
+        record["tiling"] = tile_report
+        print(f"predict: {record['filename']} -> boxes: {len(record['detections'])}"
+              + (f" (near-duplicate, distance {distance})" if record["near_duplicate"] else "")
+              + (f" ({tile_report['tiles']} tiles)" if tile_report else ""))
+        metrics.inc("images_total", result="near_duplicate" if record["near_duplicate"] else "detected")
+        for class_name, count in class_counts_of(detections).items():
+            metrics.inc("objects_total", count, **{"class": class_name})
+        if annotate:
+            render_fingerprint = fingerprint
+            if record["near_duplicate"]:
+                # Borrowed boxes: render under their own variant, never the image's real one
+                render_fingerprint = content_hash(fingerprint.encode() + b"|near-duplicate|" + detections.tobytes())
+            _annotate(record, lambda image=image: image, eager, confidence, encoding, render_fingerprint)
+        if not record["near_duplicate"]:
+            new_results.append((key, {"detections": record["detections"]}))
+
+    # One write (and SQLite commit) for the whole call rather than per image
+    result_cache.put_many(new_results)
+    return records
+
+
+def _annotate(record: dict, get_image, eager: bool, confidence: float, encoding: AnnotationOptions,
+              fingerprint: str = None):
+    """Render the record's annotated image (and thumbnail) now, or schedule
+    them for first download. `get_image` returns the decoded image or None."""
+    get_image = functools.lru_cache(maxsize=1)(get_image)  # Decode at most once
+    record["annotated_image"] = _annotated_variant(record, get_image, eager, confidence, encoding, fingerprint)
+    if encoding.thumbnail_max_dim:
+        record["thumbnail_image"] = _annotated_variant(
+            record, get_image, eager, confidence, encoding.thumbnail(), fingerprint
+        )
+
+
+def _annotated_variant(record: dict, get_image, eager: bool, confidence: float, options: AnnotationOptions,
+                       fingerprint: str = None):
+    annotated_path = annotated_path_for(record, confidence, options, fingerprint)
+    if os.path.exists(annotated_path):
+        # Same content, model, confidence and encoding: the existing render is still valid
+        upload_store.touch(annotated_path)
+        return annotated_path
+    image = get_image() if eager else None
+    if image is not None:
+        return save_annotated(annotated_path, image, record["detections"], options)
+    if record["source"]:
+        schedule_annotation(annotated_path, record["source"], record["detections"], options)
+        return annotated_path
+    return None
+
+
+def class_counts_of(detections: np.ndarray) -> dict:
+    """Count detections by class name"""
+    return class_counts(detections[:, 0], class_names)
 
 class_names = {
     0: 'OxygenTank',
@@ -75,159 +694,354 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "model_loaded": model is not None}
+    """Liveness: answers as soon as the server is up, with the model load state"""
+    return {
+        "status": "healthy",
+        "model_status": model_state["status"],  # loading, ready or failed
+        "model_loaded": model_ready(),
+        "model_error": model_state["error"],
+        "model_load_seconds": model_state["load_seconds"],
+        "inference_queue": inference_executor.stats()
+    }
+
+@app.get("/ready")
+def readiness_check():
+    """Readiness: 200 once the model is loaded and warmed up, 503 before that"""
+    if not model_ready():
+        raise model_unavailable()
+    return {"status": "ready", "backend": MODEL_BACKEND}
+
+@app.get("/stats")
+def get_stats():
+    return {
+        "inference_queue": inference_executor.stats(),
+        "single_batcher": single_batcher.stats(),
+        "result_cache": result_cache.stats(),
+        "jobs": job_manager.stats(),
+        "upload_store": upload_store.stats(),
+        "download_cache": download_cache.stats(),
+        "near_duplicates": near_duplicate_index.stats(),
+        "worker_pool": worker_pool.stats() if worker_pool is not None else None
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Pipeline metrics in the Prometheus text exposition format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+def measured_inference_ms():
+    """Mean measured per-image inference time, or the configured estimate"""
+    seconds = metrics.mean("stage_seconds", stage="inference")
+    if seconds is None:
+        return MODEL_METRICS["inference_time_ms"]
+    return round(seconds * 1000, 1)
 
 @app.get("/model-info")
 def get_model_info():
     return {
-        "model": "YOLOv8m Fine-tuned",
-        "classes": len(model.names),
-        "mAP": 84.1,
+        "model": MODEL_NAME,
+        "status": model_state["status"],
+        "backend": MODEL_BACKEND if model_ready() else None,
+        "model_file": model_file if model_ready() else None,
+        "inference_processes": INFERENCE_PROCESSES,
+        "input_size": MODEL_IMGSZ,  # Images are letterboxed to this; clients may pre-resize
+        "classes": len(model.names) if model is not None else len(class_names),
+        "mAP": MODEL_METRICS["mAP"],
+        "inference_time_ms": measured_inference_ms(),
         "classes_list": class_names
     }
 
 @app.post("/predict/single")
 async def predict_single(
+    request: Request,
     file: UploadFile = File(...),
-    confidence: float = 0.25
+    confidence: float = 0.25,
+    save_original: bool = SAVE_UPLOADS,
+    eager_annotation: bool = EAGER_ANNOTATION,
+    columnar: bool = False,
+    encoding: AnnotationOptions = Depends(annotation_options),
+    reuse_distance: Optional[int] = Depends(near_duplicate_option),
+    tiling: Optional[TileOptions] = Depends(tiling_option)
 ):
-    """Predict single image"""
+    """Predict single image (columnar=true returns detections as parallel arrays).
+
+    annotated_format (png, jpeg, webp), annotated_quality and
+    annotated_max_dim override the annotated image encoding; thumbnail=true
+    also returns a small thumbnail_image. near_duplicates=true reuses the
+    detections of a nearly identical recent image (flagged near_duplicate).
+    tiled=true (with tile_size, tile_overlap, tile_batch_size) predicts a
+    large image as overlapping tiles and reports tile timing in `tiling`.
+    """
+    await require_model()
+    # Concurrent single requests are gathered into one batched forward pass
+    result = await single_batcher.submit(
+        file, key=(float(confidence), save_original, eager_annotation, columnar, encoding, reuse_distance, tiling)
+    )
+    return negotiated_response(result, request)
+
+async def _run_single_batch(files: list, key: tuple) -> list:
+    return await inference_executor.run(_predict_single_batch, files, *key)
+
+single_batcher = MicroBatcher(
+    _run_single_batch,
+    max_batch_size=SINGLE_BATCH_MAX_SIZE,
+    max_wait_ms=SINGLE_BATCH_MAX_WAIT_MS,
+    max_concurrent_batches=INFERENCE_WORKERS,
+    # As many requests as the executor would hold as full batches; beyond that, 503
+    max_queued=SINGLE_BATCH_MAX_SIZE * (INFERENCE_WORKERS + INFERENCE_QUEUE_DEPTH)
+)
+
+def _predict_single_batch(
+    files: List[UploadFile],
+    confidence: float,
+    save_original: bool,
+    eager_annotation: bool,
+    columnar: bool = False,
+    encoding: AnnotationOptions = None,
+    reuse_distance: Optional[int] = None,
+    tiling: Optional[TileOptions] = None
+) -> list:
+    """Predict a micro-batch of /predict/single requests sharing the same options.
+
+    Returns one response dict (or HTTPException) per request, in order.
+    """
     try:
-        # Save uploaded file
-        file_location = f"{UPLOAD_DIR}/{file.filename}"
-        with open(file_location, "wb+") as file_object:
-            shutil.copyfileobj(file.file, file_object)
-        
-        # Run prediction
-        results = model.predict(file_location, conf=float(confidence))
-        # Debug: log number of boxes
-        try:
-            boxes = results[0].boxes
-            print(f"predict_single: {file.filename} -> boxes: {0 if boxes is None else len(boxes)}")
-        except Exception as _:
-            print('predict_single: could not read boxes')
-        
-        # Process results
-        detections = []
-        if results[0].boxes is not None:
-            for box in results[0].boxes:
-                cls_id = int(box.cls.item())  # Use .item() to extract scalar
-                conf = float(box.conf.item())  # Use .item() to extract scalar
-                bbox = box.xyxy.cpu().numpy()[0].tolist()
-                
-                detections.append({
-                    "class": class_names.get(cls_id, f"Class_{cls_id}"),
-                    "confidence": round(conf, 3),
-                    "bbox": [int(x) for x in bbox],
-                    "class_id": cls_id
-                })
-        
-        # Create annotated image
-        annotated_img = results[0].plot()
-        
-        # Fix image format - convert BGR to RGB if needed
-        if annotated_img is not None:
-            # annotated_img is already in BGR format from YOLO
-            output_path = f"{UPLOAD_DIR}/annotated_{file.filename}"
-            success = cv2.imwrite(output_path, annotated_img)
-            
-            if not success:
-                # If cv2.imwrite fails, try alternative method
-                from PIL import Image
-                img_rgb = cv2.cvtColor(annotated_img, cv2.COLOR_BGR2RGB)
-                pil_img = Image.fromarray(img_rgb)
-                pil_img.save(output_path)
-        else:
-            output_path = file_location
-        
-        return {
-            "filename": file.filename,
-            "detections_count": len(detections),
-            "detections": detections,
-            "annotated_image": f"/download/{output_path}",
-            "confidence_threshold": confidence,
-            "timestamp": datetime.now().isoformat()
-        }
-        
+        uploads = read_uploads([(file.filename, file.file) for file in files])
+        records = process_uploads(
+            uploads, confidence, save_original, eager=eager_annotation, encoding=encoding,
+            reuse_distance=reuse_distance, tiling=tiling
+        )
     except Exception as e:
         import traceback
         print(f"Error in predict_single: {str(e)}")
         print(traceback.format_exc())
-        raise HTTPException(status_code=500, detail=str(e))
+        return [HTTPException(status_code=500, detail=str(e))] * len(files)
+
+    outputs = []
+    for record in records:
+        if record["error"] == "unreadable_image":
+            outputs.append(HTTPException(status_code=400, detail="unreadable_image"))
+            continue
+        if record["error"]:
+            outputs.append(HTTPException(status_code=500, detail=record["error"]))
+            continue
+
+        detections, counts = format_detections(record["detections"], class_names, columnar)
+        output_path = record["annotated_image"] or record["source"]
+        thumbnail_path = record["thumbnail_image"]
+        outputs.append({
+            "filename": record["filename"],
+            "detections_count": len(record["detections"]),
+            "detections": detections,
+            "class_counts": counts,
+            "annotated_image": f"/download/{output_path}" if output_path else None,
+            "thumbnail_image": f"/download/{thumbnail_path}" if thumbnail_path else None,
+            "confidence_threshold": confidence,
+            "cached": record["cached"],
+            "near_duplicate": record["near_duplicate"],
+            **tiling_report(record),
+            "timestamp": datetime.now().isoformat()
+        })
+    return outputs
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+    "msgpack": "application/msgpack"  # Concatenated MessagePack records
+}
+
+def negotiate_stream(stream: Optional[str], request: Request) -> Optional[str]:
+    """Pick the streaming format from the `stream` parameter or Accept header"""
+    if stream:
+        if stream not in STREAM_MEDIA_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported stream format '{stream}'. Use one of: {', '.join(STREAM_MEDIA_TYPES)}"
+            )
+        if stream == "msgpack" and msgpack is None:
+            raise HTTPException(status_code=406, detail="MessagePack support is not installed")
+        return stream
+    accept = request.headers.get("accept", "")
+    for stream_format, media_type in STREAM_MEDIA_TYPES.items():
+        # Accept: application/msgpack alone asks for a whole msgpack response
+        if stream_format != "msgpack" and media_type in accept:
+            return stream_format
+    return None
+
+def encode_stream_record(record_type: str, payload: dict, stream_format: str) -> bytes:
+    if stream_format == "sse":
+        return b"event: " + record_type.encode() + b"\ndata: " + dumps_json(payload) + b"\n\n"
+    if stream_format == "msgpack":
+        return dumps_msgpack({"type": record_type, **payload})
+    return dumps_json({"type": record_type, **payload}) + b"\n"
+
+def _process_handles(handles: list, confidence: float, save_original: bool, annotate: bool, eager: bool,
+                     encoding: AnnotationOptions = None, reuse_distance: Optional[int] = None,
+                     tiling: Optional[TileOptions] = None) -> list:
+    uploads = read_uploads(handles)
+    return process_uploads(uploads, confidence, save_original, annotate, eager, encoding, reuse_distance, tiling)
+
+async def stream_batch(
+    files: List[UploadFile],
+    stream_format: str,
+    format_result,
+    confidence: float,
+    save_original: bool,
+    annotate: bool = True,
+    eager: bool = EAGER_ANNOTATION,
+    summary: dict = None,
+    encoding: AnnotationOptions = None,
+    reuse_distance: Optional[int] = None,
+    tiling: Optional[TileOptions] = None
+) -> StreamingResponse:
+    """Stream one formatted result per image, then a summary record.
+
+    Images go through the model MAX_INFERENCE_BATCH at a time and each
+    result is sent as soon as its group finishes, so neither the client nor
+    the server waits for (or holds) the whole batch.
+    """
+    # FastAPI closes UploadFiles when the endpoint returns, before a
+    # streaming body runs, so take over the spooled files and close them here
+    handles = []
+    for file in files:
+        handles.append((file.filename, file.file))
+        file.file = io.BytesIO()
+    groups = [handles[i:i + MAX_INFERENCE_BATCH] for i in range(0, len(handles), MAX_INFERENCE_BATCH)]
+
+    def close_handles():
+        for _, handle in handles:
+            handle.close()
+
+    async def run_group(group: list) -> list:
+        # Later groups wait for room on the executor instead of failing mid-stream
+        while True:
+            try:
+                return await inference_executor.run(
+                    _process_handles, group, confidence, save_original, annotate, eager, encoding, reuse_distance,
+                    tiling
+                )
+            except QueueFullError:
+                await asyncio.sleep(0.05)
+
+    # Run the first group before responding so a full queue is still a 503
+    try:
+        first_records = await inference_executor.run(
+            _process_handles, groups[0], confidence, save_original, annotate, eager, encoding, reuse_distance,
+            tiling
+        ) if groups else []
+    except Exception:
+        close_handles()
+        raise
+
+    async def generate():
+        total_images = 0
+        total_detections = 0
+        failed_images = 0
+        try:
+            for index, group in enumerate(groups):
+                records = first_records if index == 0 else await run_group(group)
+                for record in records:
+                    image_result = format_result(record)
+                    total_images += 1
+                    total_detections += image_result["detections_count"]
+                    failed_images += 1 if record["error"] else 0
+                    yield encode_stream_record("result", image_result, stream_format)
+            yield encode_stream_record("summary", {
+                **(summary or {}),
+                "status": "success",
+                "total_images": total_images,
+                "total_detections": total_detections,
+                "failed_images": failed_images,
+                "avg_detections_per_image": round(total_detections / max(total_images, 1), 2),
+                "timestamp": datetime.now().isoformat()
+            }, stream_format)
+        except Exception as e:
+            print(f"Error while streaming batch results: {str(e)}")
+            yield encode_stream_record("error", {"detail": str(e)}, stream_format)
+        finally:
+            close_handles()
+
+    return StreamingResponse(
+        generate(),
+        media_type=STREAM_MEDIA_TYPES[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def tiling_report(record: dict) -> dict:
+    """`tiling` entry for a formatted result, only when the image was tiled"""
+    return {"tiling": record["tiling"]} if record.get("tiling") else {}
+
+def batch_image_result(record: dict, columnar: bool = False) -> dict:
+    """Format one process_uploads record the way /predict/batch reports it"""
+    if record["error"]:
+        return {
+            "filename": record["filename"],
+            "detections_count": 0,
+            "class_counts": {},
+            "detections": format_detections(empty_detections(), class_names, columnar, include_bbox=False)[0],
+            "error": record["error"]
+        }
+
+    # Summary only: first 5 detections, without boxes
+    detections, counts = format_detections(
+        record["detections"], class_names, columnar, include_bbox=False, limit=5
+    )
+    return {
+        "filename": record["filename"],
+        "detections_count": len(record["detections"]),
+        "class_counts": counts,
+        "detections": detections,
+        "cached": record["cached"],
+        "near_duplicate": record.get("near_duplicate", False),
+        **tiling_report(record)
+    }
 
 @app.post("/predict/batch")
 async def predict_batch(
+    request: Request,
     files: List[UploadFile] = File(...),
-    confidence: float = 0.25
+    confidence: float = 0.25,
+    save_original: bool = SAVE_UPLOADS,
+    stream: Optional[str] = None,
+    columnar: bool = False,
+    reuse_distance: Optional[int] = Depends(near_duplicate_option),
+    tiling: Optional[TileOptions] = Depends(tiling_option)
 ):
-    """Predict multiple images"""
+    """
+    Predict multiple images.
+    
+    Pass stream=ndjson, stream=sse or stream=msgpack (or the ndjson/sse Accept
+    header) to get one record per image as soon as it is processed, then a
+    summary record. Send Accept: application/msgpack for a MessagePack body.
+    Pass columnar=true to get detections as parallel arrays,
+    near_duplicates=true to reuse detections for nearly identical images and
+    tiled=true to predict large images as overlapping tiles.
+    """
+    await require_model()
+    stream_format = negotiate_stream(stream, request)
+    if stream_format:
+        return await stream_batch(
+            files, stream_format, functools.partial(batch_image_result, columnar=columnar),
+            confidence, save_original,
+            annotate=False,
+            summary={"batch_id": f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"},
+            reuse_distance=reuse_distance,
+            tiling=tiling
+        )
+    result = await inference_executor.run(
+        _predict_batch, files, confidence, save_original, columnar, reuse_distance, tiling
+    )
+    return negotiated_response(result, request)
+
+def _predict_batch(files: List[UploadFile], confidence: float, save_original: bool, columnar: bool = False,
+                   reuse_distance: Optional[int] = None, tiling: Optional[TileOptions] = None):
     try:
-        batch_results = []
-        
-        for file in files:
-            # Save file - create parent directories if needed
-            file_location = f"{UPLOAD_DIR}/{file.filename}"
-            os.makedirs(os.path.dirname(file_location) or UPLOAD_DIR, exist_ok=True)
-            with open(file_location, "wb+") as file_object:
-                shutil.copyfileobj(file.file, file_object)
-
-            # Check if image is readable (skip truncated/unreadable files)
-            if not is_image_readable(file_location):
-                print(f"Skipping unreadable image: {file.filename}")
-                batch_results.append({
-                    "filename": file.filename,
-                    "detections_count": 0,
-                    "class_counts": {},
-                    "detections": [],
-                    "error": "unreadable_image"
-                })
-                continue
+        uploads = read_uploads([(file.filename, file.file) for file in files])
 
-            # Predict (model.predict can raise if input cannot be decoded)
-            try:
-                results = model.predict(file_location, conf=float(confidence))
-            except Exception as e:
-                print(f"model.predict failed for {file.filename}: {e}")
-                batch_results.append({
-                    "filename": file.filename,
-                    "detections_count": 0,
-                    "class_counts": {},
-                    "detections": [],
-                    "error": f"predict_error: {str(e)}"
-                })
-                continue
-            # Debug: log number of boxes for this file
-            try:
-                boxes = results[0].boxes
-                print(f"predict_batch: {file.filename} -> boxes: {0 if boxes is None else len(boxes)}")
-            except Exception:
-                print(f"predict_batch: could not read boxes for {file.filename}")
-            
-            # Process
-            detections = []
-            if results[0].boxes is not None:
-                for box in results[0].boxes:
-                    cls_id = int(box.cls.item())  # Use .item() to extract scalar
-                    conf = float(box.conf.item())  # Use .item() to extract scalar
-                    
-                    detections.append({
-                        "class": class_names.get(cls_id, f"Class_{cls_id}"),
-                        "confidence": round(conf, 3),
-                        "class_id": cls_id
-                    })
-            
-            # Count by class
-            class_counts = {}
-            for det in detections:
-                class_name = det["class"]
-                class_counts[class_name] = class_counts.get(class_name, 0) + 1
-            
-            batch_results.append({
-                "filename": file.filename,
-                "detections_count": len(detections),
-                "class_counts": class_counts,
-                "detections": detections[:5]  # First 5 detections
-            })
+        records = process_uploads(
+            uploads, confidence, save_original, annotate=False, reuse_distance=reuse_distance, tiling=tiling
+        )
+        batch_results = [batch_image_result(record, columnar) for record in records]
         
         # Calculate batch statistics
         total_images = len(batch_results)
@@ -242,6 +1056,8 @@ async def predict_batch(
             "timestamp": datetime.now().isoformat()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         print(f"Error in predict_batch: {str(e)}")
@@ -249,17 +1065,74 @@ async def predict_batch(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/download/{file_path:path}")
-async def download_file(file_path: str):
-    """Serve annotated images"""
-    if os.path.exists(file_path):
-        return FileResponse(file_path)
-    raise HTTPException(status_code=404, detail="File not found")
+async def download_file(request: Request, file_path: str):
+    """Serve stored originals and annotated images, rendering the latter on first request.
+
+    Files are content-addressed, so responses carry a strong ETag (answered
+    with 304 on If-None-Match) and an immutable Cache-Control, and support
+    Range requests. Only paths inside the upload store are served.
+    """
+    if not upload_store.contains(file_path):
+        raise HTTPException(status_code=404, detail="File not found")
+    if not os.path.exists(file_path) and has_pending_annotation(file_path):
+        await inference_executor.run(render_pending_annotation, file_path)
+    if not os.path.isfile(file_path):
+        raise HTTPException(status_code=404, detail="File not found")
+    upload_store.touch(file_path)
+    return await run_in_threadpool(serve_file, request, file_path, download_cache, DOWNLOAD_CACHE_CONTROL)
+
+def chunked_image_result(record: dict, columnar: bool = False) -> dict:
+    """Format one process_uploads record the way /predict/batch-chunked reports it"""
+    if record["error"]:
+        return {
+            "filename": record["filename"],
+            "detections": format_detections(empty_detections(), class_names, columnar)[0],
+            "detections_count": 0,
+            "class_counts": {},
+            "annotated_image": None,
+            "thumbnail_image": None,
+            "error": record["error"]
+        }
+
+    detections, counts = format_detections(record["detections"], class_names, columnar)
+    annotated_path = record["annotated_image"]
+    thumbnail_path = record.get("thumbnail_image")
+    return {
+        "filename": record["filename"],
+        "detections": detections,
+        "detections_count": len(record["detections"]),
+        "class_counts": counts,
+        "annotated_image": f"/download/{annotated_path}" if annotated_path else None,
+        "thumbnail_image": f"/download/{thumbnail_path}" if thumbnail_path else None,
+        "cached": record["cached"],
+        "near_duplicate": record.get("near_duplicate", False),
+        **tiling_report(record)
+    }
+
+def validate_chunked_request(files: List[UploadFile]):
+    if not files:
+        raise HTTPException(status_code=400, detail="No files provided")
+    
+    # Validate chunk_size
+    if len(files) > 1000:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Too many files in single request ({len(files)}). Maximum is 1000. Please use smaller chunks."
+        )
 
 @app.post("/predict/batch-chunked")
 async def predict_batch_chunked(
+    request: Request,
     files: List[UploadFile] = File(...),
     confidence: float = 0.25,
-    chunk_size: int = 50
+    chunk_size: int = 50,
+    save_original: bool = SAVE_UPLOADS,
+    eager_annotation: bool = EAGER_ANNOTATION,
+    stream: Optional[str] = None,
+    columnar: bool = False,
+    encoding: AnnotationOptions = Depends(annotation_options),
+    reuse_distance: Optional[int] = Depends(near_duplicate_option),
+    tiling: Optional[TileOptions] = Depends(tiling_option)
 ):
     """
     Process images in chunks to avoid request size and field limits.
@@ -270,20 +1143,56 @@ async def predict_batch_chunked(
     For 1400 images:
     - chunk_size=50 → 28 requests
     - chunk_size=100 → 14 requests (max recommended)
+
+    Annotated images are rendered when first downloaded; pass
+    eager_annotation=true to render them during the request instead.
+    annotated_format, annotated_quality and annotated_max_dim override the
+    configured encoding; thumbnail=true adds a small thumbnail_image per
+    image for grids. near_duplicates=true (optionally with
+    near_duplicate_distance) reuses detections for nearly identical images.
+    tiled=true (optionally with tile_size, tile_overlap and tile_batch_size)
+    predicts each image as overlapping tiles, batched together and merged
+    back into whole-image boxes, so small objects in large images are not
+    lost; each result then reports its tiles and tile timing in `tiling`.
+    
+    Pass stream=ndjson, stream=sse or stream=msgpack (or the ndjson/sse Accept
+    header) to get one record per image as soon as it is processed, then a
+    summary record. Send Accept: application/msgpack for a MessagePack body.
+
+    Pass columnar=true to get each image's detections as parallel arrays
+    (class_id, confidence, x1, y1, x2, y2) - much smaller for busy images.
     """
+    await require_model()
+    stream_format = negotiate_stream(stream, request)
+    if stream_format:
+        validate_chunked_request(files)
+        return await stream_batch(
+            files, stream_format, functools.partial(chunked_image_result, columnar=columnar),
+            confidence, save_original,
+            eager=eager_annotation,
+            encoding=encoding,
+            reuse_distance=reuse_distance,
+            tiling=tiling
+        )
+    result = await inference_executor.run(
+        _predict_batch_chunked, files, confidence, chunk_size, save_original, eager_annotation, columnar,
+        encoding, reuse_distance, tiling
+    )
+    return negotiated_response(result, request)
+
+def _predict_batch_chunked(
+    files: List[UploadFile],
+    confidence: float,
+    chunk_size: int,
+    save_original: bool,
+    eager_annotation: bool,
+    columnar: bool = False,
+    encoding: AnnotationOptions = None,
+    reuse_distance: Optional[int] = None,
+    tiling: Optional[TileOptions] = None
+):
     try:
-        if not files:
-            raise HTTPException(status_code=400, detail="No files provided")
-        
-        if not model:
-            raise HTTPException(status_code=400, detail="Model not loaded")
-        
-        # Validate chunk_size
-        if len(files) > 1000:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Too many files in single request ({len(files)}). Maximum is 1000. Please use smaller chunks."
-            )
+        validate_chunked_request(files)
         
         total_images = len(files)
         total_detections = 0
@@ -295,84 +1204,16 @@ async def predict_batch_chunked(
             chunk_num = (i // chunk_size) + 1
             print(f"Processing chunk {chunk_num} ({len(chunk)} images)...")
             
-            for file in chunk:
-                # Save file - create parent directories if needed
-                file_location = f"{UPLOAD_DIR}/{file.filename}"
-                os.makedirs(os.path.dirname(file_location) or UPLOAD_DIR, exist_ok=True)
-                with open(file_location, "wb+") as file_object:
-                    shutil.copyfileobj(file.file, file_object)
-                
-                # Predict: ensure file is readable first
-                if not is_image_readable(file_location):
-                    print(f"Skipping unreadable image in chunk: {file.filename}")
-                    batch_results.append({
-                        "filename": file.filename,
-                        "detections": [],
-                        "detections_count": 0,
-                        "class_counts": {},
-                        "annotated_image": None,
-                        "error": "unreadable_image"
-                    })
-                    continue
-
-                try:
-                    results = model.predict(file_location, conf=float(confidence))
-                except Exception as e:
-                    print(f"model.predict failed for chunk file {file.filename}: {e}")
-                    batch_results.append({
-                        "filename": file.filename,
-                        "detections": [],
-                        "detections_count": 0,
-                        "class_counts": {},
-                        "annotated_image": None,
-                        "error": f"predict_error: {str(e)}"
-                    })
-                    continue
-
-                # Debug: log number of boxes for this file in chunk
-                try:
-                    boxes = results[0].boxes
-                    print(f"predict_batch_chunked: {file.filename} -> boxes: {0 if boxes is None else len(boxes)}")
-                except Exception:
-                    print(f"predict_batch_chunked: could not read boxes for {file.filename}")
-                
-                # Process
-                detections = []
-                if results[0].boxes is not None:
-                    for box in results[0].boxes:
-                        cls_id = int(box.cls.item())
-                        conf = float(box.conf.item())
-                        
-                        detections.append({
-                            "class": class_names.get(cls_id, f"Class_{cls_id}"),
-                            "confidence": round(conf, 3),
-                            "bbox": [round(x, 2) for x in box.xyxy[0].tolist()]
-                        })
-                
-                total_detections += len(detections)
-                
-                # Save annotated image
-                annotated_path = f"{UPLOAD_DIR}/annotated_{file.filename}"
-                try:
-                    cv2.imwrite(annotated_path, results[0].plot())
-                except Exception as e:
-                    print(f"cv2 save failed, trying PIL: {e}")
-                    from PIL import Image
-                    Image.fromarray(results[0].plot()).save(annotated_path)
-                
-                # Get class counts
-                class_counts = {}
-                for det in detections:
-                    cls = det["class"]
-                    class_counts[cls] = class_counts.get(cls, 0) + 1
-                
-                batch_results.append({
-                    "filename": file.filename,
-                    "detections": detections,
-                    "detections_count": len(detections),
-                    "class_counts": class_counts,
-                    "annotated_image": f"/download/{annotated_path}"
-                })
+            uploads = read_uploads([(file.filename, file.file) for file in chunk])
+            
+            records = process_uploads(
+                uploads, confidence, save_original, eager=eager_annotation, encoding=encoding,
+                reuse_distance=reuse_distance, tiling=tiling
+            )
+            for record in records:
+                image_result = chunked_image_result(record, columnar)
+                total_detections += image_result["detections_count"]
+                batch_results.append(image_result)
         
         return {
             "status": "success",
@@ -383,32 +1224,362 @@ async def predict_batch_chunked(
             "timestamp": datetime.now().isoformat()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         print(f"Error in predict_batch_chunked: {str(e)}")
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
-if __name__ == "__main__":
-    # Run Uvicorn server with increased request limits for large batch uploads
-    # For 1400 images, recommend using /predict/batch-chunked endpoint
-    import sys
+SHA256_HEX = re.compile(r"[0-9a-f]{64}")
+
+class LookupRequest(BaseModel):
+    hashes: List[str]
+    confidence: float = 0.25
+
+@app.post("/predict/lookup")
+async def predict_lookup(
+    request: Request,
+    lookup: LookupRequest,
+    columnar: bool = False,
+    encoding: AnnotationOptions = Depends(annotation_options)
+):
+    """
+    Return stored results for images the server has already processed.
+    
+    Send the SHA-256 hex digests of the image files and the confidence you
+    would predict with. Results found in the result cache come back under
+    `found` (keyed by hash, formatted like /predict/batch-chunked images);
+    only the hashes listed in `missing` need to be uploaded.
+    """
+    if len(lookup.hashes) > LOOKUP_MAX_HASHES:
+        raise HTTPException(status_code=400, detail=f"At most {LOOKUP_MAX_HASHES} hashes per lookup")
+    hashes = [digest.lower() for digest in lookup.hashes]
+    invalid = [digest for digest in hashes if not SHA256_HEX.fullmatch(digest)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Not SHA-256 hex digests: {invalid[:5]}")
+    await require_model()
+    result = await run_in_threadpool(_predict_lookup, hashes, lookup.confidence, columnar, encoding)
+    return negotiated_response(result, request)
+
+def _predict_lookup(hashes: list, confidence: float, columnar: bool, encoding: AnnotationOptions) -> dict:
+    found = {}
+    missing = []
+    for digest in dict.fromkeys(hashes):  # Unique, in order
+        entry = result_cache.get(ResultCache.make_key(digest, confidence, model_fingerprint))
+        if entry is None:
+            missing.append(digest)
+            metrics.inc("lookup_hashes_total", result="miss")
+            continue
+        metrics.inc("lookup_hashes_total", result="hit")
+        record = {
+            "filename": digest,
+            "hash": digest,
+            "source": upload_store.find_original(digest),
+            "detections": detections_to_array(entry["detections"]),
+            "annotated_image": None,
+            "thumbnail_image": None,
+            "cached": True,
+            "error": None
+        }
+        # Annotated images come from the stored original, rendered on first download
+        _annotate(record, lambda: None, False, confidence, encoding)
+        result = chunked_image_result(record, columnar)
+        del result["filename"]  # Only the client knows its file names
+        found[digest] = result
+    return {
+        "confidence_threshold": confidence,
+        "found": found,
+        "missing": missing,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.post("/predict/archive")
+async def predict_archive(
+    request: Request,
+    confidence: float = 0.25,
+    save_original: bool = SAVE_UPLOADS,
+    eager_annotation: bool = EAGER_ANNOTATION,
+    columnar: bool = False,
+    encoding: AnnotationOptions = Depends(annotation_options),
+    reuse_distance: Optional[int] = Depends(near_duplicate_option),
+    tiling: Optional[TileOptions] = Depends(tiling_option)
+):
+    """
+    Predict every image in a tar or zip archive sent as the raw request body.
     
-    # Check if running on Windows
-    if sys.platform == "win32":
-        uvicorn.run(
-            app,
-            host="0.0.0.0",
-            port=8000,
-            use_colors=True,
-            # Note: On Windows with PowerShell, use:
-            # uvicorn app:app --host 0.0.0.0 --port 8000 --limit-request-fields 32000 --limit-request-line 8190
+    Members are read one at a time while the upload streams in and are run
+    through the model in batches, so a whole folder is one request with no
+    multipart form fields. For example:
+    
+    tar -cf - images/ | curl --data-binary @- -H "Content-Type: application/x-tar" \\
+        http://localhost:8000/predict/archive
+    """
+    await require_model()
+    inference_executor.ensure_capacity()
+    reader = RequestBodyReader(request.stream(), asyncio.get_running_loop())
+    result = await run_in_threadpool(
+        _predict_archive, reader, confidence, save_original, eager_annotation, columnar, encoding,
+        reuse_distance, tiling
+    )
+    return negotiated_response(result, request)
+
+def _predict_archive(reader, confidence: float, save_original: bool, eager_annotation: bool,
+                     columnar: bool = False, encoding: AnnotationOptions = None,
+                     reuse_distance: Optional[int] = None, tiling: Optional[TileOptions] = None):
+    batch_results = []
+    skipped_members = 0
+    group = []
+
+    def flush():
+        records = inference_executor.call(
+            process_uploads, list(group), confidence, save_original, eager=eager_annotation,
+            encoding=encoding, reuse_distance=reuse_distance, tiling=tiling
         )
-    else:
-        uvicorn.run(
-            app,
-            host="0.0.0.0",
-            port=8000,
-            limit_request_fields=32000,
-            limit_request_line=8190,
-        )
\ No newline at end of file
+        batch_results.extend(chunked_image_result(record, columnar) for record in records)
+        group.clear()
+
+    try:
+        for name, data in iter_archive_members(reader, MAX_FILE_SIZE_MB * 1024 * 1024):
+            # Report members by base name; storage paths come from the content hash
+            filename = Path(name).name
+            if Path(filename).suffix.lower() not in ALLOWED_EXTENSIONS:
+                skipped_members += 1
+                continue
+            if data is None:
+                batch_results.append(
+                    chunked_image_result({"filename": filename, "error": "file_too_large"}, columnar)
+                )
+                continue
+            group.append((filename, data))
+            if len(group) >= MAX_INFERENCE_BATCH:
+                flush()
+        if group:
+            flush()
+    except ArchiveError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    total_images = len(batch_results)
+    total_detections = sum(r["detections_count"] for r in batch_results)
+    return {
+        "status": "success",
+        "total_images": total_images,
+        "total_detections": total_detections,
+        "avg_detections_per_image": round(total_detections / max(total_images, 1), 2),
+        "skipped_members": skipped_members,
+        "images": batch_results,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.post("/predict/video")
+async def predict_video(
+    request: Request,
+    confidence: float = 0.25,
+    stride: Optional[int] = None,
+    fps: Optional[float] = None,
+    filename: str = "video.mp4",
+    columnar: bool = False,
+    reuse_distance: Optional[int] = Depends(near_duplicate_option)
+):
+    """
+    Detect objects in a video sent as the raw request body.
+    
+    Every `stride`-th frame is sampled, or frames at about `fps` per second
+    (VIDEO_DEFAULT_FPS when neither is given), and run through the model in
+    batches. Returns a per-frame timeline plus when each class was seen.
+    With near_duplicates=true, frames nearly identical to recent ones reuse
+    their detections and are flagged near_duplicate in the timeline.
+    `filename` only supplies the container extension. For example:
+    
+    curl --data-binary @clip.mp4 "http://localhost:8000/predict/video?fps=2&filename=clip.mp4"
+    """
+    suffix = Path(filename).suffix.lower()
+    if suffix not in VIDEO_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported video type '{suffix}'. Use one of: {', '.join(sorted(VIDEO_EXTENSIONS))}"
+        )
+    if (stride is not None and stride < 1) or (fps is not None and fps <= 0):
+        raise HTTPException(status_code=400, detail="stride must be >= 1 and fps > 0")
+    if stride is None and fps is None:
+        fps = VIDEO_DEFAULT_FPS
+    await require_model()
+    inference_executor.ensure_capacity()
+    reader = RequestBodyReader(request.stream(), asyncio.get_running_loop())
+    result = await run_in_threadpool(
+        _predict_video, reader, suffix, confidence, stride, fps, columnar, reuse_distance
+    )
+    return negotiated_response(result, request)
+
+def _predict_video(reader, suffix: str, confidence: float, stride: Optional[int], fps: Optional[float],
+                   columnar: bool = False, reuse_distance: Optional[int] = None) -> dict:
+    try:
+        video_path = spool_to_tempfile(reader, suffix, VIDEO_MAX_SIZE_MB * 1024 * 1024)
+    except VideoTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except VideoError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    timeline = []
+    batch = []
+
+    def flush():
+        predictions, distances = inference_executor.call(
+            predict_with_reuse, [frame for _, _, frame in batch], confidence, reuse_distance
+        )
+        for (index, seconds, _), (detections, error), distance in zip(batch, predictions, distances):
+            entry = {"frame": index, "time_s": round(seconds, 3)}
+            if error is not None:
+                entry["error"] = f"predict_error: {error}"
+                metrics.inc("images_total", result="error")
+                metrics.inc("errors_total", type="predict_error")
+            else:
+                entry["detections"], entry["class_counts"] = format_detections(detections, class_names, columnar)
+                entry["detections_count"] = len(detections)
+                if distance is not None:
+                    entry["near_duplicate"] = True
+                metrics.inc("images_total", result="near_duplicate" if distance is not None else "detected")
+                for class_name, count in class_counts_of(detections).items():
+                    metrics.inc("objects_total", count, **{"class": class_name})
+            timeline.append(entry)
+        batch.clear()
+
+    try:
+        frames = VideoFrames(video_path, stride, fps, VIDEO_MAX_FRAMES)
+        for sample in frames:
+            batch.append(sample)
+            if len(batch) >= MAX_INFERENCE_BATCH:
+                flush()
+        if batch:
+            flush()
+    except VideoError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        os.remove(video_path)
+
+    total_detections = sum(entry.get("detections_count", 0) for entry in timeline)
+    return {
+        "status": "success",
+        "video": frames.info(),
+        "confidence_threshold": confidence,
+        "total_frames": len(timeline),
+        "total_detections": total_detections,
+        "avg_detections_per_frame": round(total_detections / max(len(timeline), 1), 2),
+        "near_duplicate_frames": sum(1 for entry in timeline if entry.get("near_duplicate")),
+        "classes": summarize_classes(timeline),
+        "timeline": timeline,
+        "timestamp": datetime.now().isoformat()
+    }
+
+def _process_job_batch(uploads: list, options: dict) -> list:
+    """Run one batch of a background job through the shared inference executor"""
+    # Jobs resumed at startup wait here until the model has loaded
+    model_loaded.wait()
+    if not model_ready():
+        raise RuntimeError(f"Model failed to load: {model_state['error']}")
+    records = inference_executor.call(
+        process_uploads,
+        uploads,
+        options["confidence"],
+        options["save_original"],
+        # Job results are usually fetched long after the job ran: render
+        # while the image is still decoded instead of on first download
+        eager=True,
+        encoding=AnnotationOptions(**options["encoding"]) if options.get("encoding") else None,
+        reuse_distance=options.get("reuse_distance"),
+        tiling=TileOptions(**options["tiling"]) if options.get("tiling") else None
+    )
+    return [chunked_image_result(record, options.get("columnar", False)) for record in records]
+
+job_manager = JobManager(JOBS_DIR, _process_job_batch, JOB_BATCH_SIZE)
+
+# Background work starts in startup hooks, never at import: with `python
+# app.py`, each inference worker process re-imports this module.
+@app.on_event("startup")
+def start_jobs():
+    job_manager.start()
+
+metrics.gauge(
+    "queue_depth",
+    "Work currently queued, by queue",
+    lambda: {
+        (("queue", "inference_running"),): inference_executor.running,
+        (("queue", "inference_waiting"),): inference_executor.queued,
+        (("queue", "single_batcher"),): single_batcher.stats()["queued"],
+        (("queue", "jobs"),): job_manager.stats()["queued"],
+        (("queue", "pending_annotations"),): len(pending_annotations)
+    }
+)
+
+@app.on_event("shutdown")
+def stop_background_work():
+    if worker_pool is not None:
+        worker_pool.shutdown()
+    upload_store.stop()
+
+@app.post("/jobs", status_code=202)
+def create_job(
+    files: List[UploadFile] = File(...),
+    confidence: float = 0.25,
+    save_original: bool = SAVE_UPLOADS,
+    columnar: bool = False,
+    encoding: AnnotationOptions = Depends(annotation_options),
+    reuse_distance: Optional[int] = Depends(near_duplicate_option),
+    tiling: Optional[TileOptions] = Depends(tiling_option)
+):
+    """
+    Queue images for background processing and return the job id right away.
+    
+    Poll GET /jobs/{job_id} for progress and page through
+    GET /jobs/{job_id}/results as images complete. Annotated images are
+    rendered while the job runs, so result links survive restarts.
+    """
+    if not files:
+        raise HTTPException(status_code=400, detail="No files provided")
+    options = {
+        "confidence": float(confidence),
+        "save_original": save_original,
+        "columnar": columnar,
+        "encoding": encoding._asdict(),
+        "reuse_distance": reuse_distance,
+        "tiling": tiling._asdict() if tiling is not None else None
+    }
+    return job_manager.create([(file.filename, file.file) for file in files], options)
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Job progress: processed, failed, throughput and ETA"""
+    job = job_manager.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}/results")
+def get_job_results(request: Request, job_id: str, offset: int = 0, limit: int = 100):
+    """Page through per-image results written so far"""
+    job = job_manager.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    offset = max(offset, 0)
+    limit = min(max(limit, 1), 1000)
+    results = job_manager.results(job_id, offset, limit)
+    next_offset = offset + len(results)
+    return negotiated_response({
+        "job_id": job_id,
+        "status": job["status"],
+        "offset": offset,
+        "limit": limit,
+        "available": job["processed"],
+        "next_offset": next_offset if next_offset < job["total"] else None,
+        "results": results
+    }, request)
+
+if __name__ == "__main__":
+    # Large uploads: use /predict/archive (one streamed request) or
+    # /predict/batch-chunked (at most 1000 files per multipart request)
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        use_colors=True,
+    )
@@ -0,0 +1,162 @@
+"""
+Streaming readers for tar and zip archives.
+Members are yielded one at a time straight from a forward-only stream,
+so an upload is never buffered whole in memory or spooled to disk.
+"""
+
+import asyncio
+import io
+import struct
+import tarfile
+import zlib
+
+ZIP_LOCAL_HEADER = b"PK\x03\x04"
+ZIP_DATA_DESCRIPTOR = b"PK\x07\x08"
+ZIP_CENTRAL_DIRECTORY = b"PK\x01\x02"
+ZIP_END_OF_CENTRAL_DIRECTORY = b"PK\x05\x06"
+
+
+class ArchiveError(Exception):
+    """Raised when an archive cannot be read as a stream"""
+
+
+class RequestBodyReader(io.RawIOBase):
+    """Blocking file-like view of an async request body.
+
+    Meant to be read from a worker thread: each read pulls the next chunk
+    from the event loop, so the body is only received as fast as it is
+    consumed.
+    """
+
+    def __init__(self, chunks, loop):
+        self._chunks = chunks.__aiter__()
+        self._loop = loop
+        self._buffer = b""
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._buffer and not self._eof:
+            try:
+                future = asyncio.run_coroutine_threadsafe(self._chunks.__anext__(), self._loop)
+                self._buffer = future.result()
+            except StopAsyncIteration:
+                self._eof = True
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def _read_exact(stream, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ArchiveError("Unexpected end of archive")
+    return data
+
+
+def iter_tar_members(stream, max_member_bytes: int):
+    """Yield (name, data or None) for each regular file in a tar stream.
+
+    Handles plain and gzip/bz2/xz compressed tars. Members bigger than
+    max_member_bytes are yielded with data None and not read into memory.
+    """
+    try:
+        with tarfile.open(fileobj=stream, mode="r|*") as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                if member.size > max_member_bytes:
+                    yield member.name, None
+                    continue
+                yield member.name, archive.extractfile(member).read()
+    except tarfile.TarError as e:
+        raise ArchiveError(f"Invalid tar archive: {e}")
+
+
+def iter_zip_members(stream, max_member_bytes: int):
+    """Yield (name, data or None) for each file in a zip stream.
+
+    Walks local file headers in order instead of seeking to the central
+    directory. Stored and deflated members are supported, including ones
+    written with a trailing data descriptor (sizes unknown up front).
+    """
+    while True:
+        signature = stream.read(4)
+        if signature in (b"", ZIP_CENTRAL_DIRECTORY, ZIP_END_OF_CENTRAL_DIRECTORY):
+            return  # Past the last member
+        if signature != ZIP_LOCAL_HEADER:
+            raise ArchiveError("Invalid zip archive: bad local header signature")
+
+        (_version, flags, method, _time, _date, _crc, compressed_size, size,
+         name_length, extra_length) = struct.unpack("<HHHHHIIIHH", _read_exact(stream, 26))
+        name = _read_exact(stream, name_length).decode("utf-8" if flags & 0x800 else "cp437")
+        _read_exact(stream, extra_length)
+        has_descriptor = bool(flags & 0x08)
+
+        if flags & 0x01:
+            raise ArchiveError(f"Encrypted zip members are not supported ({name})")
+        if method not in (0, 8):
+            raise ArchiveError(f"Unsupported zip compression method {method} ({name})")
+        if has_descriptor and method == 0:
+            raise ArchiveError(f"Stored zip member without sizes cannot be streamed ({name})")
+
+        if has_descriptor:
+            data = _inflate_until_end(stream, max_member_bytes)
+            # Optional signature, then crc32 + sizes (zip64 not supported)
+            descriptor = _read_exact(stream, 4)
+            if descriptor == ZIP_DATA_DESCRIPTOR:
+                _read_exact(stream, 4)
+            _read_exact(stream, 8)
+        elif size > max_member_bytes:
+            _skip(stream, compressed_size)
+            data = None
+        elif method == 0:
+            data = _read_exact(stream, compressed_size)
+        else:
+            data = zlib.decompress(_read_exact(stream, compressed_size), -15)
+
+        if name.endswith("/"):
+            continue  # Directory entry
+        yield name, data
+
+
+def _inflate_until_end(stream, max_member_bytes: int):
+    """Inflate a deflate stream of unknown length; return None if it is too big.
+
+    Peeks at buffered input and only consumes what the inflater used, so
+    nothing past the end of the member is taken from the stream.
+    """
+    inflater = zlib.decompressobj(-15)
+    output = []
+    output_size = 0
+    while not inflater.eof:
+        chunk = stream.peek(64 * 1024)
+        if not chunk:
+            raise ArchiveError("Unexpected end of archive")
+        piece = inflater.decompress(chunk)
+        stream.read(len(chunk) - len(inflater.unused_data))
+        output_size += len(piece)
+        if output_size <= max_member_bytes:
+            output.append(piece)
+    if output_size > max_member_bytes:
+        return None
+    return b"".join(output)
+
+
+def _skip(stream, size: int):
+    while size > 0:
+        chunk = stream.read(min(size, 1024 * 1024))
+        if not chunk:
+            raise ArchiveError("Unexpected end of archive")
+        size -= len(chunk)
+
+
+def iter_archive_members(stream, max_member_bytes: int):
+    """Detect zip or tar from the first bytes and yield (name, data or None)"""
+    stream = io.BufferedReader(stream) if not hasattr(stream, "peek") else stream
+    if stream.peek(4)[:4] == ZIP_LOCAL_HEADER:
+        return iter_zip_members(stream, max_member_bytes)
+    return iter_tar_members(stream, max_member_bytes)
@@ -4,14 +4,60 @@ Splits images into chunks to avoid request size limits
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+import copy
+import hashlib
 import json
+import io
 import os
+import random
+import tarfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
 import sys
 from typing import List
 import time
 
+try:
+    import msgpack  # Smaller, faster responses when available
+except ImportError:
+    msgpack = None
+
 API_BASE_URL = "http://localhost:8000"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Concurrent uploads
+# Chunk size starts at the requested value and then follows the server's
+# latency: chunks grow while they finish faster than TARGET_CHUNK_SECONDS and
+# shrink when they are slower or fail. The server accepts at most 1000 files
+# per request; MAX_CHUNK_SIZE keeps well inside that.
+DEFAULT_WORKERS = 4
+MIN_CHUNK_SIZE = 4
+MAX_CHUNK_SIZE = 100
+TARGET_CHUNK_SECONDS = 8.0
+MAX_RETRIES = 4
+RETRY_BACKOFF_S = 1.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Client-side resizing (--resize)
+# The model letterboxes every image to its input size, so larger images are
+# downscaled to that size and re-encoded as JPEG before upload; boxes in the
+# results are scaled back to original image coordinates.
+DEFAULT_INPUT_SIZE = 640
+RESIZE_JPEG_QUALITY = 90
+
+# Hash-first handshake (on by default, --no-lookup to skip)
+# Content hashes are sent to /predict/lookup first; images the server already
+# has results for are not uploaded again.
+LOOKUP_BATCH_SIZE = 1000
+# With --resize, the resized images made for hashing are kept for upload (up
+# to this much memory) instead of being resized again
+LOOKUP_KEEP_RESIZED_MB = 512
+
+# Video files are sent whole to /predict/video instead of as images
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.webm'}
 
 class Colors:
     GREEN = '\033[92m'
@@ -52,6 +98,43 @@ def get_image_files(directory: str) -> List[str]:
     
     return sorted(image_files)
 
+def iter_stream_records(response):
+    """Yield records from an NDJSON or MessagePack result stream"""
+    if response.headers.get("content-type", "").startswith(MSGPACK_MEDIA_TYPE):
+        unpacker = msgpack.Unpacker(raw=False)
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            unpacker.feed(chunk)
+            yield from unpacker
+        return
+    for line in response.iter_lines():
+        if line:
+            yield json.loads(line)
+
+def decode_response(response):
+    """Body of a non-streamed response, MessagePack or JSON"""
+    if response.headers.get("content-type", "").startswith(MSGPACK_MEDIA_TYPE):
+        return msgpack.unpackb(response.content, raw=False)
+    return response.json()
+
+def consume_result_stream(response, on_result=None) -> dict:
+    """Read an NDJSON or MessagePack result stream and return its final summary record.
+    
+    Calls on_result(image_result) for each image as soon as it arrives, so
+    results never have to be held in memory all at once.
+    """
+    summary = None
+    for record in iter_stream_records(response):
+        record_type = record.pop("type", None)
+        if record_type == "result" and on_result:
+            on_result(record)
+        elif record_type == "summary":
+            summary = record
+        elif record_type == "error":
+            raise RuntimeError(record.get("detail", "stream error"))
+    if summary is None:
+        raise RuntimeError("Result stream ended before the summary record")
+    return summary
+
 def upload_batch_chunked(
     image_files: List[str],
     confidence: float = 0.25,
@@ -107,10 +190,11 @@ def upload_batch_chunked(
                 print_warning(f"No valid files in chunk {chunk_idx + 1}")
                 continue
             
-            # Send request
-            data = {
+            # Send request - results are streamed back one image at a time
+            params = {
                 'confidence': confidence,
-                'chunk_size': chunk_size
+                'chunk_size': chunk_size,
+                'stream': 'msgpack' if msgpack else 'ndjson'
             }
             
             print_info(f"Uploading {len(files)} images...")
@@ -119,18 +203,30 @@ def upload_batch_chunked(
             response = requests.post(
                 f"{API_BASE_URL}/predict/batch-chunked",
                 files=files,
-                data=data,
+                params=params,
+                stream=True,
                 timeout=600  # 10 minute timeout
             )
             
-            elapsed = time.time() - start_time
-            
             # Close all files
             for _, f in files:
                 f.close()
             
             if response.status_code == 200:
-                result = response.json()
+                progress = {"received": 0, "first_image": None}
+                
+                def on_result(image_result):
+                    progress["received"] += 1
+                    if progress["received"] == 1:
+                        progress["first_image"] = image_result
+                        print_info(f"  First result after {time.time() - start_time:.1f}s")
+                    print(f"\r  {progress['received']}/{len(files)} images", end="", flush=True)
+                
+                with response:
+                    result = consume_result_stream(response, on_result)
+                print()
+                elapsed = time.time() - start_time
+                
                 print_success(f"Chunk {chunk_idx + 1} processed successfully in {elapsed:.1f}s")
                 print_info(f"  Images processed: {result.get('total_images')}")
                 print_info(f"  Total detections: {result.get('total_detections')}")
@@ -145,12 +241,11 @@ def upload_batch_chunked(
                 })
                 
                 # Show sample detections
-                if result.get('images') and len(result['images']) > 0:
-                    first_image = result['images'][0]
-                    if first_image.get('detections'):
-                        print_info(f"  Sample detections from {first_image.get('filename')}:")
-                        for det in first_image.get('detections', [])[:3]:
-                            print(f"    - {det.get('class', 'Unknown')}: {det.get('confidence', 0)*100:.1f}%")
+                first_image = progress["first_image"]
+                if first_image and first_image.get('detections'):
+                    print_info(f"  Sample detections from {first_image.get('filename')}:")
+                    for det in first_image.get('detections', [])[:3]:
+                        print(f"    - {det.get('class', 'Unknown')}: {det.get('confidence', 0)*100:.1f}%")
                 
             else:
                 print_error(f"Chunk {chunk_idx + 1} failed with status {response.status_code}")
@@ -193,6 +288,479 @@ def upload_batch_chunked(
     
     return all_results
 
+class UploadError(Exception):
+    """A chunk that could not be uploaded"""
+
+
+class AdaptiveChunkSize:
+    """Chunk size steered towards a target per-chunk server latency"""
+
+    def __init__(self, initial: int, minimum: int = MIN_CHUNK_SIZE, maximum: int = MAX_CHUNK_SIZE,
+                 target_seconds: float = TARGET_CHUNK_SECONDS):
+        self.maximum = maximum
+        self.minimum = min(minimum, maximum)
+        self.size = max(self.minimum, min(initial, maximum))
+        self.target_seconds = target_seconds
+        self._lock = threading.Lock()
+
+    def observe(self, images: int, seconds: float):
+        if images <= 0 or seconds <= 0:
+            return
+        with self._lock:
+            ideal = images * self.target_seconds / seconds
+            # Move halfway towards the ideal size, at most doubling per step
+            proposed = min((self.size + ideal) / 2, self.size * 2)
+            self.size = int(max(self.minimum, min(proposed, self.maximum)))
+
+    def back_off(self):
+        with self._lock:
+            self.size = max(self.minimum, self.size // 2)
+
+
+_thread_state = threading.local()
+
+def get_session() -> requests.Session:
+    """Keep-alive session for the calling thread, so each worker reuses one connection"""
+    session = getattr(_thread_state, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _thread_state.session = session
+    return session
+
+def read_chunk(paths: List[str]) -> list:
+    """(name, bytes) for each readable file; read once so retries resend from memory"""
+    chunk = []
+    for img_path in paths:
+        try:
+            with open(img_path, 'rb') as f:
+                chunk.append((Path(img_path).name, f.read()))
+        except OSError as e:
+            print_warning(f"Could not read file {img_path}: {e}")
+    return chunk
+
+def shrink_image(img_path: str, max_side: int):
+    """Read an image and downscale it so its longest side is max_side, as JPEG.
+    
+    Returns (upload name, bytes, (scale_x, scale_y)) where the scales map
+    uploaded coordinates back to the original image, or None if the file
+    cannot be read. Images that are already small, that cv2 cannot decode, or
+    that would not get smaller are sent unchanged with a scale of 1.
+    """
+    import cv2
+    import numpy as np
+    try:
+        with open(img_path, 'rb') as f:
+            raw = f.read()
+    except OSError as e:
+        print_warning(f"Could not read file {img_path}: {e}")
+        return None
+    unchanged = (Path(img_path).name, raw, (1.0, 1.0))
+    image = cv2.imdecode(np.frombuffer(raw, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return unchanged  # The server reports it as unreadable
+    height, width = image.shape[:2]
+    factor = max_side / max(height, width)
+    if factor >= 1:
+        return unchanged
+    size = (max(1, round(width * factor)), max(1, round(height * factor)))
+    small = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode(".jpg", small, [cv2.IMWRITE_JPEG_QUALITY, RESIZE_JPEG_QUALITY])
+    if not ok or encoded.nbytes >= len(raw):
+        return unchanged
+    return f"{Path(img_path).stem}.jpg", encoded.tobytes(), (width / size[0], height / size[1])
+
+def restore_coordinates(image_result: dict, scale: tuple):
+    """Scale an image result's boxes from the uploaded size back to the original"""
+    scale_x, scale_y = scale
+    if scale_x == 1.0 and scale_y == 1.0:
+        return
+    for det in image_result.get('detections') or []:
+        x1, y1, x2, y2 = det['bbox']
+        det['bbox'] = [round(x1 * scale_x, 2), round(y1 * scale_y, 2), round(x2 * scale_x, 2), round(y2 * scale_y, 2)]
+
+def file_digest(img_path: str, resize_to: int = None):
+    """(SHA-256 hex digest, scale, resized upload) of the bytes that would be uploaded for img_path.
+    
+    The resized upload is shrink_image's result with resize_to, else None.
+    """
+    if resize_to:
+        item = shrink_image(img_path, resize_to)
+        return (hashlib.sha256(item[1]).hexdigest(), item[2], item) if item else None
+    digest = hashlib.sha256()
+    try:
+        with open(img_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+    except OSError:
+        return None  # Reported when the upload tries to read it
+    return digest.hexdigest(), (1.0, 1.0), None
+
+def query_lookup(hashes: List[str], confidence: float):
+    """Server results for the hashes it knows, or None if the lookup failed"""
+    try:
+        response = get_session().post(
+            f"{API_BASE_URL}/predict/lookup",
+            json={'hashes': hashes, 'confidence': confidence},
+            headers={'Accept': MSGPACK_MEDIA_TYPE if msgpack else 'application/json'},
+            timeout=120
+        )
+        if response.status_code != 200:
+            print_warning(f"Hash lookup unavailable (status {response.status_code}), uploading everything")
+            return None
+        return decode_response(response)['found']
+    except Exception as e:
+        print_warning(f"Hash lookup failed ({e}), uploading everything")
+        return None
+
+def lookup_known_results(image_files: List[str], confidence: float, resize_to: int, pool) -> tuple:
+    """Ask the server which images it has already processed.
+    
+    Returns (files still to upload, results for the others, resized
+    uploads). With resize_to, the resized images made for hashing are
+    returned as {path: shrink_image result} (up to LOOKUP_KEEP_RESIZED_MB)
+    so they are not resized again for upload. Any lookup failure just means
+    those images get uploaded as usual.
+    """
+    to_upload = []
+    known = []
+    resized = {}
+    kept_bytes = 0
+    for start in range(0, len(image_files), LOOKUP_BATCH_SIZE):
+        paths = image_files[start:start + LOOKUP_BATCH_SIZE]
+        digests = list(pool.map(lambda path: file_digest(path, resize_to), paths))
+        found = query_lookup(list(dict.fromkeys(item[0] for item in digests if item)), confidence)
+        lookup_failed = found is None
+        for img_path, item in zip(paths, digests):
+            if lookup_failed or item is None or item[0] not in found:
+                to_upload.append(img_path)
+                upload = item[2] if item else None
+                if upload and kept_bytes + len(upload[1]) <= LOOKUP_KEEP_RESIZED_MB * 1024 * 1024:
+                    resized[img_path] = upload
+                    kept_bytes += len(upload[1])
+                continue
+            digest, scale, _ = item
+            image_result = copy.deepcopy(found[digest])  # Identical files share one server result
+            image_result['filename'] = Path(img_path).name
+            restore_coordinates(image_result, scale)
+            known.append(image_result)
+        if lookup_failed:
+            # Stop hashing and asking: the remaining groups are uploaded as usual
+            to_upload.extend(image_files[start + LOOKUP_BATCH_SIZE:])
+            break
+    return to_upload, known, resized
+
+def post_chunk(chunk: list, confidence: float, retries: int = MAX_RETRIES) -> dict:
+    """POST one chunk to /predict/batch-chunked, retrying transient failures.
+    
+    Connection errors, timeouts, broken streams and 429/5xx responses are
+    retried with exponential backoff (or the server's Retry-After). Returns
+    the per-image results, summary and the successful attempt's latency;
+    raises UploadError when the chunk cannot be processed.
+    """
+    params = {
+        'confidence': confidence,
+        'chunk_size': len(chunk),
+        'stream': 'msgpack' if msgpack else 'ndjson'
+    }
+    error = None
+    retry_after = None
+    for attempt in range(retries + 1):
+        if attempt:
+            if retry_after and retry_after.isdigit():
+                time.sleep(int(retry_after))  # The server said when to come back
+            else:
+                delay = RETRY_BACKOFF_S * 2 ** (attempt - 1)
+                time.sleep(delay * random.uniform(0.75, 1.25))  # Jitter so workers do not retry in step
+        retry_after = None
+        start_time = time.perf_counter()
+        try:
+            files = [('files', (name, data)) for name, data in chunk]
+            response = get_session().post(
+                f"{API_BASE_URL}/predict/batch-chunked",
+                files=files,
+                params=params,
+                stream=True,
+                timeout=600
+            )
+            with response:
+                if response.status_code == 200:
+                    images = []
+                    summary = consume_result_stream(response, images.append)
+                    return {
+                        "images": images,
+                        "summary": summary,
+                        "seconds": time.perf_counter() - start_time,
+                        "attempts": attempt + 1
+                    }
+                error = f"status {response.status_code}: {response.text[:200]}"
+                if response.status_code not in RETRYABLE_STATUS:
+                    raise UploadError(error)
+                retry_after = response.headers.get("Retry-After")
+        except (requests.exceptions.RequestException, RuntimeError) as e:
+            error = str(e)
+    raise UploadError(f"gave up after {retries + 1} attempts: {error}")
+
+def upload_chunk_files(paths: List[str], confidence: float, resize_to: int = None, encode_pool=None,
+                       resized: dict = None) -> dict:
+    if not resize_to:
+        chunk = read_chunk(paths)
+        if not chunk:
+            return {"images": [], "summary": {}, "seconds": 0.0, "attempts": 0}
+        return post_chunk(chunk, confidence)
+    
+    # Reuse images resized while hashing; decode, resize and encode the rest
+    # on the shared pool while other chunks upload
+    kept = {path: resized.pop(path) for path in paths if path in resized} if resized else {}
+    shrunk = encode_pool.map(lambda path: kept.get(path) or shrink_image(path, resize_to), paths)
+    prepared = [(path, item) for path, item in zip(paths, shrunk) if item]
+    if not prepared:
+        return {"images": [], "summary": {}, "seconds": 0.0, "attempts": 0}
+    outcome = post_chunk([(name, data) for _, (name, data, _) in prepared], confidence)
+    # Results stream back in upload order
+    for image_result, (path, (_, _, scale)) in zip(outcome["images"], prepared):
+        image_result['filename'] = Path(path).name
+        restore_coordinates(image_result, scale)
+    return outcome
+
+def upload_concurrent(
+    image_files: List[str],
+    confidence: float = 0.25,
+    chunk_size: int = 50,
+    workers: int = DEFAULT_WORKERS,
+    resize_to: int = None,
+    lookup: bool = True
+) -> dict:
+    """Upload images to /predict/batch-chunked with several chunks in flight
+    
+    Each worker thread keeps its own keep-alive connection. Chunk size adapts
+    to observed server latency, failed chunks are retried with backoff, and
+    chunks that still fail are reported at the end instead of stopping the run.
+    With resize_to, images are downscaled to that longest side before upload
+    (annotated images are then rendered at the reduced size; boxes in the
+    results are in original coordinates). With lookup, images the server has
+    already processed are matched by content hash and not uploaded.
+    """
+    workers = max(1, workers)
+    chunk_sizer = AdaptiveChunkSize(chunk_size)
+    total_images = len(image_files)
+    print_info(f"Total images to process: {total_images}")
+    print_info(f"Workers: {workers}, starting chunk size: {chunk_sizer.size} (adapts to server latency)")
+    if resize_to:
+        print_info(f"Resizing images to {resize_to}px (longest side) before upload")
+    
+    all_results = {
+        "total_images_processed": 0,
+        "total_detections": 0,
+        "failed_images": 0,
+        "chunks": [],
+        "failed_chunks": [],
+        "reused_results": 0,
+        "images": []
+    }
+    start_time = time.perf_counter()
+    encode_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 4) if resize_to or lookup else None
+    resized = {}  # Path -> shrink_image result made while hashing
+    
+    if lookup:
+        image_files, known, resized = lookup_known_results(image_files, confidence, resize_to, encode_pool)
+        all_results["reused_results"] = len(known)
+        all_results["total_images_processed"] += len(known)
+        all_results["total_detections"] += sum(image_result['detections_count'] for image_result in known)
+        all_results["images"].extend(known)
+        print_info(f"Server already has results for {len(known)} images; uploading {len(image_files)}")
+    
+    remaining = deque(image_files)
+    in_flight = {}
+    chunk_number = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while remaining or in_flight:
+            while remaining and len(in_flight) < workers:
+                chunk_number += 1
+                paths = [remaining.popleft() for _ in range(min(chunk_sizer.size, len(remaining)))]
+                future = pool.submit(upload_chunk_files, paths, confidence, resize_to, encode_pool, resized)
+                in_flight[future] = (chunk_number, paths)
+            
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                number, paths = in_flight.pop(future)
+                try:
+                    outcome = future.result()
+                except UploadError as e:
+                    chunk_sizer.back_off()
+                    all_results["failed_images"] += len(paths)
+                    all_results["failed_chunks"].append({"chunk_number": number, "files": paths, "error": str(e)})
+                    print_error(f"Chunk {number} ({len(paths)} images) failed: {e}")
+                    continue
+                
+                summary = outcome["summary"]
+                chunk_sizer.observe(len(outcome["images"]), outcome["seconds"])
+                all_results["total_images_processed"] += summary.get('total_images', 0)
+                all_results["total_detections"] += summary.get('total_detections', 0)
+                all_results["failed_images"] += summary.get('failed_images', 0)
+                all_results["images"].extend(outcome["images"])
+                all_results["chunks"].append({
+                    "chunk_number": number,
+                    "images_processed": summary.get('total_images'),
+                    "detections": summary.get('total_detections'),
+                    "seconds": round(outcome["seconds"], 2),
+                    "attempts": outcome["attempts"]
+                })
+                
+                elapsed = time.perf_counter() - start_time
+                processed = all_results["total_images_processed"]
+                print_progress(
+                    f"Chunk {number}: {len(outcome['images'])} images in {outcome['seconds']:.1f}s | "
+                    f"{processed}/{total_images} done, {processed / elapsed:.1f} img/s, "
+                    f"next chunk size {chunk_sizer.size}"
+                )
+    
+    if encode_pool is not None:
+        encode_pool.shutdown()
+    elapsed = time.perf_counter() - start_time
+    all_results["elapsed_seconds"] = round(elapsed, 2)
+    all_results["images_per_second"] = round(all_results["total_images_processed"] / elapsed, 2) if elapsed > 0 else 0.0
+    
+    # Final summary
+    print_progress(f"\n{'='*60}")
+    if all_results["failed_chunks"]:
+        print_warning(f"{len(all_results['failed_chunks'])} chunks failed after retries (see failed_chunks)")
+    else:
+        print_success("ALL CHUNKS PROCESSED SUCCESSFULLY!")
+    print_progress(f"{'='*60}")
+    print_info(f"Total images processed: {all_results['total_images_processed']}")
+    print_info(f"Total detections found: {all_results['total_detections']}")
+    print_info(f"Avg detections per image: {all_results['total_detections'] / max(all_results['total_images_processed'], 1):.2f}")
+    print_info(f"Throughput: {all_results['images_per_second']} images/sec ({elapsed:.1f}s total)")
+    
+    return all_results
+
+def iter_tar_stream(image_files: List[str]):
+    """Yield a tar archive of the images piece by piece, one file at a time"""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w|") as archive:
+        for img_path in image_files:
+            try:
+                archive.add(img_path, arcname=Path(img_path).name)
+            except OSError as e:
+                print_warning(f"Could not read file {img_path}: {e}")
+                continue
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def upload_archive(image_files: List[str], confidence: float = 0.25) -> dict:
+    """Upload all images as one streamed tar archive to /predict/archive
+    
+    No chunking needed: the server reads the archive member by member while
+    it is still being uploaded.
+    """
+    total_images = len(image_files)
+    print_info(f"Total images to process: {total_images}")
+    print_info("Streaming images as a single tar archive...")
+    start_time = time.time()
+    
+    try:
+        response = requests.post(
+            f"{API_BASE_URL}/predict/archive",
+            data=iter_tar_stream(image_files),
+            params={'confidence': confidence},
+            headers={
+                'Content-Type': 'application/x-tar',
+                'Accept': MSGPACK_MEDIA_TYPE if msgpack else 'application/json'
+            },
+            timeout=3600
+        )
+    except requests.exceptions.Timeout:
+        print_error("Archive upload timed out")
+        return None
+    except Exception as e:
+        print_error(f"Error uploading archive: {str(e)}")
+        return None
+    
+    elapsed = time.time() - start_time
+    if response.status_code != 200:
+        print_error(f"Archive upload failed with status {response.status_code}")
+        print_error(f"Response: {response.text[:500]}")
+        return None
+    
+    result = decode_response(response)
+    print_progress(f"\n{'='*60}")
+    print_success(f"Archive processed successfully in {elapsed:.1f}s")
+    print_progress(f"{'='*60}")
+    print_info(f"Total images processed: {result.get('total_images')}")
+    print_info(f"Total detections found: {result.get('total_detections')}")
+    print_info(f"Avg detections per image: {result.get('avg_detections_per_image')}")
+    
+    return {
+        "total_images_processed": result.get('total_images', 0),
+        "total_detections": result.get('total_detections', 0),
+        "images": result.get('images', [])
+    }
+
+def upload_video(video_path: str, confidence: float = 0.25, fps: float = None, stride: int = None) -> dict:
+    """Stream a video file to /predict/video and return its detection timeline
+    
+    The server samples frames (every `stride`-th frame, or about `fps` per
+    second) and decodes them itself, so no frames are extracted locally.
+    """
+    params = {'confidence': confidence, 'filename': Path(video_path).name}
+    if stride:
+        params['stride'] = stride
+    if fps:
+        params['fps'] = fps
+    print_info(f"Uploading video {video_path} ({os.path.getsize(video_path) / (1024 * 1024):.1f}MB)...")
+    start_time = time.time()
+    try:
+        with open(video_path, 'rb') as f:
+            response = requests.post(
+                f"{API_BASE_URL}/predict/video",
+                data=f,  # Streamed from disk, not read into memory
+                params=params,
+                headers={
+                    'Content-Type': 'application/octet-stream',
+                    'Accept': MSGPACK_MEDIA_TYPE if msgpack else 'application/json'
+                },
+                timeout=3600
+            )
+    except requests.exceptions.Timeout:
+        print_error("Video upload timed out")
+        return None
+    except Exception as e:
+        print_error(f"Error uploading video: {str(e)}")
+        return None
+    
+    elapsed = time.time() - start_time
+    if response.status_code != 200:
+        print_error(f"Video upload failed with status {response.status_code}")
+        print_error(f"Response: {response.text[:500]}")
+        return None
+    
+    result = decode_response(response)
+    video = result.get('video', {})
+    print_progress(f"\n{'='*60}")
+    print_success(f"Video processed successfully in {elapsed:.1f}s")
+    print_progress(f"{'='*60}")
+    print_info(f"Frames sampled: {result.get('total_frames')} (1 in every {video.get('stride')} of {video.get('frame_count')} frames)")
+    print_info(f"Total detections found: {result.get('total_detections')}")
+    print_info(f"Throughput: {result.get('total_frames', 0) / max(elapsed, 1e-6):.1f} frames/sec")
+    for name, summary in sorted(result.get('classes', {}).items()):
+        print(f"    - {name}: {summary['frames']} frames, "
+              f"{summary['first_seen_s']:.1f}s to {summary['last_seen_s']:.1f}s, up to {summary['max_count']} at once")
+    return result
+
+def get_input_size() -> int:
+    """Model input size reported by the server (/model-info)"""
+    try:
+        response = requests.get(f"{API_BASE_URL}/model-info", timeout=10)
+        return int(response.json().get("input_size") or DEFAULT_INPUT_SIZE)
+    except Exception as e:
+        print_warning(f"Could not read the model input size ({e}), using {DEFAULT_INPUT_SIZE}")
+        return DEFAULT_INPUT_SIZE
+
 def main():
     print(f"\n{Colors.CYAN}")
     print("╔════════════════════════════════════════════════════════╗")
@@ -201,12 +769,22 @@ def main():
     print("╚════════════════════════════════════════════════════════╝")
     print(Colors.END)
     
+    # Positional arguments and --flags (--name or --name=value)
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    flags = dict(arg.partition('=')[::2] for arg in sys.argv[1:] if arg.startswith('--'))
+    
     # Get directory from user
-    if len(sys.argv) > 1:
-        image_dir = sys.argv[1]
+    if len(args) > 0:
+        image_dir = args[0]
     else:
-        print_info("Usage: python batch_upload.py <image_directory> [chunk_size] [confidence]")
+        print_info("Usage: python batch_upload.py <image_directory> [chunk_size] [confidence] [--workers=N] [--sequential] [--archive]")
         print_info("Example: python batch_upload.py ./my_images 50 0.25")
+        print_info(f"  --workers=N: chunks kept in flight at once (default {DEFAULT_WORKERS})")
+        print_info("  --sequential: upload one chunk at a time, stopping at the first failure")
+        print_info("  --resize: downscale images to the model input size before upload")
+        print_info("  --no-lookup: upload every image, even ones the server has already processed")
+        print_info("Video: python batch_upload.py <video_file> [confidence] [--fps=N | --stride=N]")
+        print_info("  --archive: send all images as one streamed tar archive (no chunking)")
         print_info("")
         print_info("Chunk size recommendations:")
         print_info("  - 50 (default):  Safe for all systems")
@@ -217,12 +795,15 @@ def main():
     if not image_dir:
         print_error("No directory specified")
         return
+    is_video = Path(image_dir).suffix.lower() in VIDEO_EXTENSIONS and Path(image_dir).is_file()
+    if is_video and len(args) > 1:
+        args.insert(1, None)  # Videos take no chunk size: the next argument is the confidence
     
     # Get chunk size
     chunk_size = 50  # Changed default from 100 to 50
-    if len(sys.argv) > 2:
+    if len(args) > 1 and args[1] is not None:
         try:
-            chunk_size = int(sys.argv[2])
+            chunk_size = int(args[1])
             if chunk_size > 100:
                 print_warning(f"Warning: Chunk size {chunk_size} is risky. Reducing to 100.")
                 chunk_size = 100
@@ -231,18 +812,31 @@ def main():
     
     # Get confidence threshold
     confidence = 0.25
-    if len(sys.argv) > 3:
+    if len(args) > 2:
         try:
-            confidence = float(sys.argv[3])
+            confidence = float(args[2])
         except ValueError:
             print_warning(f"Invalid confidence, using default: {confidence}")
     
+    workers = DEFAULT_WORKERS
+    if flags.get('--workers'):
+        try:
+            workers = int(flags['--workers'])
+        except ValueError:
+            print_warning(f"Invalid --workers, using default: {workers}")
+    
     # Check backend
     print_info(f"Connecting to API at {API_BASE_URL}...")
     try:
         response = requests.get(f"{API_BASE_URL}/health", timeout=5)
         if response.status_code == 200:
             print_success("Backend is running and healthy!")
+            model_status = response.json().get("model_status")
+            if model_status == "loading":
+                print_warning("Model is still loading - the first requests may wait")
+            elif model_status == "failed":
+                print_error("Backend could not load the model")
+                return
         else:
             print_error("Backend is not responding properly")
             return
@@ -251,6 +845,21 @@ def main():
         print_warning("Make sure to run: python app.py in the Backend directory")
         return
     
+    if is_video:
+        try:
+            fps = float(flags['--fps']) if flags.get('--fps') else None
+            stride = int(flags['--stride']) if flags.get('--stride') else None
+        except ValueError:
+            print_error("--fps must be a number and --stride an integer")
+            return
+        result = upload_video(image_dir, confidence, fps, stride)
+        if result:
+            results_file = "video_results.json"
+            with open(results_file, 'w') as f:
+                json.dump(result, f, indent=2)
+            print_success(f"Results saved to {results_file}")
+        return
+    
     # Get images
     print_info(f"Scanning directory: {image_dir}")
     image_files = get_image_files(image_dir)
@@ -262,7 +871,15 @@ def main():
     print_success(f"Found {len(image_files)} images")
     
     # Upload
-    result = upload_batch_chunked(image_files, confidence, chunk_size)
+    if '--archive' in flags:
+        result = upload_archive(image_files, confidence)
+    elif '--sequential' in flags:
+        result = upload_batch_chunked(image_files, confidence, chunk_size)
+    else:
+        resize_to = get_input_size() if '--resize' in flags else None
+        result = upload_concurrent(
+            image_files, confidence, chunk_size, workers, resize_to, lookup='--no-lookup' not in flags
+        )
     
     if result:
         # Save results
@@ -0,0 +1,133 @@
+"""
+Dynamic micro-batching for concurrent single-image requests.
+Gathers requests that arrive within a short window and runs them through
+the model as one batch, then hands each caller its own result.
+"""
+
+import asyncio
+import time
+
+from executor import QueueFullError
+
+
+class MicroBatcher:
+    """Collects submitted items into batches of up to `max_batch_size`,
+    waiting at most `max_wait_ms` after the first item arrives.
+
+    `process_batch(payloads, key)` is an async callable that returns one
+    output per payload, in order. Items are only batched with others that
+    share the same `key` (e.g. the confidence threshold). An output that is
+    an Exception is raised to that item's caller.
+
+    At most `max_queued` items wait for a batch (0: no limit); `submit`
+    raises QueueFullError beyond that, like InferenceExecutor.
+    """
+
+    def __init__(self, process_batch, max_batch_size: int = 8, max_wait_ms: float = 5,
+                 max_concurrent_batches: int = 1, max_queued: int = 0):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+        self.max_queued = max(0, max_queued)
+        self._loop = None
+        self._queue = None
+        self._slots = None
+        self._worker = None
+
+        # Stats
+        self.items = 0
+        self.batches = 0
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+        self.rejected = 0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queued)
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._worker = loop.create_task(self._collect())
+
+    async def submit(self, payload, key=None):
+        """Queue `payload` for the next batch and await its output.
+
+        Raises QueueFullError when `max_queued` items are already waiting.
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        try:
+            self._queue.put_nowait((payload, key, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFullError(f"Batching queue is full ({self.max_queued} waiting)") from None
+        return await future
+
+    async def _collect(self):
+        while True:
+            # While every batch slot is busy, requests keep piling up in the
+            # queue so the next batch goes out as full as possible
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self._record(batch)
+            self._loop.create_task(self._dispatch(batch))
+
+    def _record(self, batch):
+        now = time.perf_counter()
+        self.batches += 1
+        self.items += len(batch)
+        for _, _, _, enqueued_at in batch:
+            waited = now - enqueued_at
+            self.total_wait += waited
+            self.max_wait_seen = max(self.max_wait_seen, waited)
+
+    async def _dispatch(self, batch):
+        try:
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[1], []).append(item)
+            for key, items in groups.items():
+                try:
+                    outputs = await self.process_batch([payload for payload, _, _, _ in items], key)
+                except Exception as e:
+                    outputs = [e] * len(items)
+                for (_, _, future, _), output in zip(items, outputs):
+                    if future.done():
+                        continue  # Caller went away
+                    if isinstance(output, Exception):
+                        future.set_exception(output)
+                    else:
+                        future.set_result(output)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> dict:
+        batches = max(self.batches, 1)
+        items = max(self.items, 1)
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queued": self.max_queued,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / batches, 2),
+            "avg_batch_fill": round(self.items / (batches * self.max_batch_size), 3),
+            "avg_queue_wait_ms": round(self.total_wait / items * 1000, 2),
+            "max_queue_wait_ms": round(self.max_wait_seen * 1000, 2),
+        }
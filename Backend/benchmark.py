@@ -0,0 +1,296 @@
+"""
+Offline benchmark for the prediction endpoints.
+Runs the FastAPI app in-process (no server, no network) against the images
+in uploads/ and writes throughput and latency percentiles to a JSON file, so
+results from two releases can be compared.
+
+Usage:
+    python benchmark.py                      # real model (models/best.pt)
+    python benchmark.py --stub-model         # no weights needed
+    python benchmark.py --stub-model --output bench.json --concurrency 1 8
+
+Needs httpx (installed with FastAPI's test client dependencies).
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).parent
+STAGES = ("upload_read", "decode", "preprocess", "inference", "postprocess", "annotation_render", "disk_write")
+
+
+# Stub model -------------------------------------------------------------------
+
+class _StubTensor:
+    """Just enough of a torch tensor for the detection post-processing"""
+
+    def __init__(self, array):
+        self.array = np.asarray(array, dtype=np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.array
+
+    def item(self):
+        return self.array.reshape(-1)[0].item()
+
+    def __len__(self):
+        return len(self.array)
+
+
+class _StubBoxes:
+    def __init__(self, data):
+        self.data = _StubTensor(data)
+        self.xyxy = _StubTensor(data[:, :4])
+        self.conf = _StubTensor(data[:, 4])
+        self.cls = _StubTensor(data[:, 5])
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield _StubBoxes(self.data.array[i:i + 1])
+
+
+class _StubResult:
+    def __init__(self, boxes, speed):
+        self.boxes = boxes
+        self.speed = speed
+
+
+class StubModel:
+    """Stands in for YOLO: fixed per-image latency and a few plausible boxes"""
+
+    names = {i: f"class_{i}" for i in range(7)}
+
+    def __init__(self, latency_ms: float):
+        self.latency_ms = latency_ms
+
+    def predict(self, source, conf=0.25, **kwargs):
+        images = source if isinstance(source, list) else [source]
+        time.sleep(self.latency_ms * len(images) / 1000)
+        results = []
+        for image in images:
+            height, width = image.shape[:2]
+            count = int(image[::16, ::16].mean()) % 5
+            data = np.array([
+                [width * 0.1 * i, height * 0.1 * i, width * (0.3 + 0.1 * i), height * (0.3 + 0.1 * i),
+                 0.5 + 0.05 * i, i % 7]
+                for i in range(count)
+            ], dtype=np.float32).reshape(count, 6)
+            speed = {"preprocess": 0.0, "inference": self.latency_ms, "postprocess": 0.0}
+            results.append(_StubResult(_StubBoxes(data), speed))
+        return results
+
+
+# Setup ------------------------------------------------------------------------
+
+def load_corpus(corpus_dir: Path, limit: int) -> list:
+    """(filename, bytes) for every original image in corpus_dir"""
+    from config import ALLOWED_EXTENSIONS
+    files = sorted(
+        path for path in corpus_dir.iterdir()
+        if path.suffix.lower() in ALLOWED_EXTENSIONS and not path.name.startswith("annotated_")
+    )
+    if limit:
+        files = files[:limit]
+    return [(path.name, path.read_bytes()) for path in files]
+
+
+def prepare_app(stub_latency_ms, use_cache: bool):
+    """Import the API with either the stub model or the real one loaded"""
+    import app as api
+    from result_cache import ResultCache
+
+    if stub_latency_ms is not None:
+        api.model = StubModel(stub_latency_ms)
+        api.model_fingerprint = "stub"
+        api.model_state["status"] = "ready"
+        api.model_loaded.set()
+    else:
+        api.load_model_in_background()  # Runs synchronously here
+        if not api.model_ready():
+            sys.exit(f"Model failed to load: {api.model_state['error']}")
+    if not use_cache:
+        # Every request should reach the model: a zero-size cache is disabled
+        api.result_cache = ResultCache(0)
+    return api
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(np.ceil(pct / 100 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+# Scenarios --------------------------------------------------------------------
+
+async def run_scenario(client, endpoint: str, corpus: list, batch_size: int, concurrency: int,
+                       total_images: int) -> dict:
+    """Send `total_images` images to `endpoint` in requests of `batch_size`,
+    keeping `concurrency` requests in flight.
+
+    Throughput and latency percentiles count successful (200) requests only;
+    failed requests are reported separately.
+    """
+    batches = []
+    for start in range(0, total_images, batch_size):
+        batches.append([corpus[i % len(corpus)] for i in range(start, min(start + batch_size, total_images))])
+
+    latencies = []
+    failed_latencies = []
+    succeeded_images = 0
+    status_counts = {}
+    pending = iter(batches)
+    params = {"save_original": "false"}
+
+    async def worker():
+        nonlocal succeeded_images
+        for batch in pending:
+            if endpoint == "/predict/single":
+                filename, data = batch[0]
+                files = {"file": (filename, data, "image/png")}
+            else:
+                files = [("files", (filename, data, "image/png")) for filename, data in batch]
+            start = time.perf_counter()
+            response = await client.post(endpoint, files=files, params=params)
+            elapsed = time.perf_counter() - start
+            if response.status_code == 200:
+                latencies.append(elapsed)
+                succeeded_images += len(batch)
+            else:
+                failed_latencies.append(elapsed)
+            status_counts[response.status_code] = status_counts.get(response.status_code, 0) + 1
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - wall_start
+
+    ordered = sorted(latencies)
+    return {
+        "endpoint": endpoint,
+        "batch_size": batch_size,
+        "concurrency": concurrency,
+        "requests": len(batches),
+        "images": total_images,
+        "succeeded_images": succeeded_images,
+        "failed_requests": len(failed_latencies),
+        "status_codes": {str(status): count for status, count in sorted(status_counts.items())},
+        "wall_seconds": round(wall, 3),
+        "images_per_second": round(succeeded_images / wall, 2) if wall > 0 else 0.0,
+        "requests_per_second": round(len(latencies) / wall, 2) if wall > 0 else 0.0,
+        "latency_ms": {
+            "mean": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+            "p50": round(percentile(ordered, 50) * 1000, 2),
+            "p95": round(percentile(ordered, 95) * 1000, 2),
+            "p99": round(percentile(ordered, 99) * 1000, 2),
+            "max": round(ordered[-1] * 1000, 2) if ordered else 0.0
+        },
+        "failed_latency_ms": {
+            "mean": round(sum(failed_latencies) / len(failed_latencies) * 1000, 2) if failed_latencies else 0.0,
+            "max": round(max(failed_latencies) * 1000, 2) if failed_latencies else 0.0
+        }
+    }
+
+
+async def run_benchmark(api, corpus: list, args) -> list:
+    import httpx
+
+    scenarios = []
+    for concurrency in args.concurrency:
+        scenarios.append(("/predict/single", 1, concurrency))
+    for endpoint in ("/predict/batch", "/predict/batch-chunked"):
+        for batch_size in args.batch_sizes:
+            for concurrency in args.concurrency:
+                scenarios.append((endpoint, batch_size, concurrency))
+
+    # Let every in-flight request queue instead of being rejected with 503,
+    # so the numbers measure throughput rather than backpressure
+    most = max(args.concurrency)
+    api.inference_executor.queue_depth = max(api.inference_executor.queue_depth, most)
+    api.single_batcher.max_queued = max(api.single_batcher.max_queued, most)
+
+    transport = httpx.ASGITransport(app=api.app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        # Warm up decoders, thread pools and the model before measuring
+        await run_scenario(client, "/predict/batch", corpus, min(8, len(corpus)), 1, min(8, len(corpus)))
+        for endpoint, batch_size, concurrency in scenarios:
+            total_images = max(args.images, batch_size * concurrency)
+            result = await run_scenario(client, endpoint, corpus, batch_size, concurrency, total_images)
+            results.append(result)
+            print(f"{endpoint:<24} batch={batch_size:<4} concurrency={concurrency:<3} "
+                  f"{result['images_per_second']:>8.1f} img/s  "
+                  f"p50={result['latency_ms']['p50']:.1f}ms p95={result['latency_ms']['p95']:.1f}ms "
+                  f"p99={result['latency_ms']['p99']:.1f}ms  failed={result['failed_requests']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the prediction endpoints in-process")
+    parser.add_argument("--corpus", type=Path, default=BASE_DIR / "uploads", help="Folder of images (default: uploads/)")
+    parser.add_argument("--limit", type=int, default=0, help="Use at most this many corpus images")
+    parser.add_argument("--images", type=int, default=64, help="Images sent per scenario")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--stub-model", action="store_true", help="Use a stub model instead of models/best.pt")
+    parser.add_argument("--stub-latency-ms", type=float, default=20.0, help="Per-image stub model latency")
+    parser.add_argument("--use-cache", action="store_true", help="Keep the result cache on (off by default)")
+    parser.add_argument("--output", type=Path, default=BASE_DIR / f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, args.limit)
+    if not corpus:
+        sys.exit(f"No images found in {args.corpus}")
+    print(f"Corpus: {len(corpus)} images from {args.corpus}")
+
+    api = prepare_app(args.stub_latency_ms if args.stub_model else None, args.use_cache)
+    results = asyncio.run(run_benchmark(api, corpus, args))
+
+    stage_ms = {}
+    for stage in STAGES:
+        mean = api.metrics.mean("stage_seconds", stage=stage)
+        stage_ms[stage] = round(mean * 1000, 3) if mean is not None else None
+
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "model": "stub" if args.stub_model else str(api.model_file),
+        "backend": "stub" if args.stub_model else api.MODEL_BACKEND,
+        "stub_latency_ms": args.stub_latency_ms if args.stub_model else None,
+        "result_cache": args.use_cache,
+        "corpus": {"path": str(args.corpus), "images": len(corpus)},
+        "stage_mean_ms": stage_ms,
+        "results": results
+    }
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,121 @@ MODEL_PATH = MODELS_DIR / "best.pt"
 MODEL_NAME = "YOLOv8m Fine-tuned"
 MODEL_CONFIDENCE_DEFAULT = 0.25
 
+# Inference backend: "pytorch", "onnx" (ONNX Runtime) or "openvino".
+# ONNX/OpenVINO graphs are exported from MODEL_PATH on first start and cached
+# under MODEL_EXPORT_DIR per weights hash; both are usually faster on CPU.
+MODEL_BACKEND = "pytorch"
+MODEL_EXPORT_DIR = MODELS_DIR / "exported"
+MODEL_IMGSZ = 640
+MODEL_WARMUP = True
+
+# Startup
+# The model loads in the background after the server starts. Prediction
+# requests arriving meanwhile wait up to MODEL_LOAD_WAIT_S, then get 503.
+MODEL_LOAD_WAIT_S = 30
+
+# Inference batching
+# Maximum number of images sent to the model in a single forward pass.
+# Larger batches amortise per-call overhead but use more memory.
+MAX_INFERENCE_BATCH = 16
+
+# Upload ingestion
+# Uploads are decoded in memory and passed straight to the model.
+# Writing the original file to uploads/ is optional (per request too).
+SAVE_UPLOADS = True
+
+# Inference executor
+# Blocking inference runs on a dedicated thread pool with a bounded queue;
+# requests beyond the queue depth get 503 + Retry-After.
+INFERENCE_WORKERS = 1
+INFERENCE_QUEUE_DEPTH = 8
+INFERENCE_RETRY_AFTER_S = 5
+
+# Multi-process inference (CPU-only hosts)
+# With INFERENCE_PROCESSES > 0 each process loads its own model replica and
+# batches are split across them; 0 runs the model in the API process.
+# Keep INFERENCE_WORKERS >= INFERENCE_PROCESSES so every process gets work,
+# and INFERENCE_PROCESSES * INFERENCE_THREADS_PER_PROCESS <= physical cores.
+INFERENCE_PROCESSES = 0
+INFERENCE_THREADS_PER_PROCESS = 2
+
+# Micro-batching for /predict/single
+# Concurrent single-image requests arriving within the wait window are run
+# as one batch of up to SINGLE_BATCH_MAX_SIZE images. Requests beyond
+# SINGLE_BATCH_MAX_SIZE * (INFERENCE_WORKERS + INFERENCE_QUEUE_DEPTH) waiting
+# get 503 + Retry-After, like the other endpoints.
+SINGLE_BATCH_MAX_SIZE = 8
+SINGLE_BATCH_MAX_WAIT_MS = 5
+
+# Result cache
+# Detections are cached by image content hash + confidence + model weights
+# hash. Set RESULT_CACHE_DB to a file path to keep results across restarts;
+# RESULT_CACHE_MAX_MB = 0 disables the cache.
+RESULT_CACHE_MAX_MB = 64
+RESULT_CACHE_DB = None  # e.g. str(BASE_DIR / "result_cache.sqlite3")
+
+# Hash lookup (POST /predict/lookup)
+# Clients send content hashes first and only upload images the server has
+# no cached result for. At most LOOKUP_MAX_HASHES hashes per request.
+LOOKUP_MAX_HASHES = 5000
+
+# Near-duplicate reuse
+# Off by default (requests can pass near_duplicates=true). Images whose 64-bit
+# perceptual hash is within NEAR_DUPLICATE_MAX_DISTANCE bits of a recently
+# processed image of the same size reuse its detections instead of running
+# the model - e.g. consecutive frames of the same scene. Higher distances
+# reuse more often at some cost in accuracy.
+NEAR_DUPLICATE_REUSE = False
+NEAR_DUPLICATE_MAX_DISTANCE = 4  # 0-64 bits
+NEAR_DUPLICATE_INDEX_SIZE = 2048  # Recent images remembered per model / confidence / size
+
+# Tiled inference
+# Off by default (requests can pass tiled=true). Large images are cut into
+# overlapping TILE_SIZE tiles that go through the model TILE_BATCH_SIZE at a
+# time, so small objects keep their pixels instead of being shrunk to the
+# model input size; boxes found twice where tiles overlap are merged.
+TILE_SIZE = MODEL_IMGSZ
+TILE_OVERLAP = 0.2  # Fraction of a tile shared with each neighbour
+TILE_BATCH_SIZE = 16
+TILE_FULL_IMAGE = True  # Also run the whole image so objects larger than a tile are found whole
+TILE_MERGE_THRESHOLD = 0.5  # Same-class boxes overlapping this much of the smaller one are merged
+TILE_MAX_TILES = 256  # Per image; larger images need a bigger tile_size
+
+# Upload store
+# Originals and annotated renders are stored once per content hash under
+# uploads/originals and uploads/annotated. A background janitor evicts the
+# least recently used files above UPLOAD_STORE_MAX_MB and anything not used
+# for UPLOAD_STORE_MAX_AGE_HOURS (None keeps files until the size cap).
+UPLOAD_STORE_MAX_MB = 2048
+UPLOAD_STORE_MAX_AGE_HOURS = 24 * 7
+UPLOAD_JANITOR_INTERVAL_S = 60
+
+# Downloads (/download)
+# Stored files are named by content hash and never change, so responses get
+# a strong ETag and a long-lived immutable Cache-Control (safe behind a CDN).
+# Files up to DOWNLOAD_CACHE_MAX_FILE_KB are also served from memory.
+DOWNLOAD_CACHE_MAX_MB = 64
+DOWNLOAD_CACHE_MAX_FILE_KB = 1024
+DOWNLOAD_MAX_AGE_S = 365 * 24 * 3600
+
+# Annotated images
+# By default annotated images are drawn the first time they are downloaded;
+# requests can pass eager_annotation=true to render them immediately.
+EAGER_ANNOTATION = False
+PENDING_ANNOTATIONS_MAX = 10000  # Not-yet-rendered images kept in memory (older ones are read from disk)
+# Encoding of annotated renders; requests can override each setting.
+# "png" is lossless but slow to write and several times larger than "jpeg" or "webp".
+ANNOTATED_FORMAT = "jpeg"  # png, jpeg or webp
+ANNOTATED_QUALITY = 85  # 1-100, ignored for png
+ANNOTATED_MAX_DIM = 1920  # Downscale renders so the longest side fits (0 = full resolution)
+THUMBNAIL_MAX_DIM = 256  # Longest side of the optional thumbnail (thumbnail=true)
+
+# Background jobs (POST /jobs)
+# Job images, progress and results are kept under JOBS_DIR so unfinished
+# jobs resume after a restart. Each worker step processes JOB_BATCH_SIZE images.
+JOBS_DIR = BASE_DIR / "jobs"
+JOB_BATCH_SIZE = 32
+
 # API configuration
 API_HOST = "0.0.0.0"
 API_PORT = 8000
@@ -50,6 +165,15 @@ MAX_FILE_SIZE_MB = 10
 # Supported file extensions
 ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif'}
 
+# Video (POST /predict/video)
+# The upload is spooled to one temporary file and decoded frame by frame;
+# frames are never written to disk. Without stride or fps in the request,
+# frames are sampled at VIDEO_DEFAULT_FPS.
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.webm'}
+VIDEO_MAX_SIZE_MB = 2048
+VIDEO_MAX_FRAMES = 20000  # Most sampled frames per video
+VIDEO_DEFAULT_FPS = 5
+
 # Model performance metrics
 MODEL_METRICS = {
     'mAP': 84.1,
@@ -0,0 +1,143 @@
+"""
+Serving stored files from /download.
+Everything in the upload store is named by content hash (plus the render
+variant for annotated images), so a file's bytes never change: the name is
+a strong ETag and responses can be cached by browsers and CDNs for good.
+Small files that are requested often are kept in memory, and Range requests
+are answered from memory or by FileResponse for files on disk.
+"""
+
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+
+class HotFileCache:
+    """Bounded LRU of small file contents: path -> bytes"""
+
+    def __init__(self, max_bytes: int, max_file_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self._lock = threading.Lock()
+        self._files = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str):
+        with self._lock:
+            data = self._files.get(path)
+            if data is None:
+                self.misses += 1
+                return None
+            self._files.move_to_end(path)
+            self.hits += 1
+            return data
+
+    def put(self, path: str, data: bytes):
+        if len(data) > self.max_file_bytes or len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._files.pop(path, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._files[path] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._files.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def discard(self, path: str):
+        with self._lock:
+            data = self._files.pop(path, None)
+            if data is not None:
+                self._bytes -= len(data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            files = len(self._files)
+            total = self._bytes
+        lookups = self.hits + self.misses
+        return {
+            "files": files,
+            "memory_mb": round(total / (1024 * 1024), 2),
+            "max_memory_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+def strong_etag(path: str) -> str:
+    """ETag from a content-addressed file name (<hash> or <hash>_<variant>)"""
+    return f'"{Path(path).stem}"'
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it)"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in header.split(",")]
+    return etag in tags or f"W/{etag}" in tags
+
+
+def parse_range(header: str, size: int):
+    """Parse a single `bytes=` range into inclusive (start, end).
+
+    Returns None when the header should be ignored (absent, malformed or
+    several ranges, which are served as the full file) and raises
+    ValueError when the range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start, separator, end = header[len("bytes="):].strip().partition("-")
+    if not separator or not (start or end).isdigit() or (start and end and not end.isdigit()):
+        return None
+    if not start:  # Suffix range: the last N bytes
+        if int(end) == 0 or size == 0:
+            raise ValueError("range not satisfiable")
+        return max(size - int(end), 0), size - 1
+    start = int(start)
+    if end and int(end) < start:
+        return None  # Last byte before the first: invalid, ignore
+    if start >= size:
+        raise ValueError("range not satisfiable")
+    return start, min(int(end), size - 1) if end else size - 1
+
+
+def serve_file(request: Request, path: str, cache: HotFileCache, cache_control: str) -> Response:
+    """Response for a stored file, honouring If-None-Match and Range"""
+    etag = strong_etag(path)
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Accept-Ranges": "bytes"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    data = cache.get(path)
+    if data is None:
+        if os.path.getsize(path) > cache.max_file_bytes:
+            # Large files stream from disk; FileResponse handles Range itself
+            return FileResponse(path, headers=headers)
+        with open(path, "rb") as f:
+            data = f.read()
+        cache.put(path, data)
+
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    # A Range sent with a stale If-Range validator gets the whole file
+    if_range = request.headers.get("if-range")
+    range_header = request.headers.get("range") if not if_range or if_range == etag else None
+    try:
+        byte_range = parse_range(range_header, len(data))
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{len(data)}"})
+    if byte_range is None:
+        return Response(data, headers=headers, media_type=media_type)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+    return Response(data[start:end + 1], status_code=206, headers=headers, media_type=media_type)
@@ -0,0 +1,108 @@
+"""
+Bounded executor for blocking inference work.
+Keeps model.predict, plotting and image writes off the asyncio event loop
+and pushes back when too many requests are already waiting.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFullError(Exception):
+    """Raised when the inference queue has no free slots"""
+
+
+class InferenceExecutor:
+    """Thread pool with a bounded number of running + queued jobs"""
+
+    def __init__(self, workers: int = 1, queue_depth: int = 8):
+        self.workers = max(1, workers)
+        self.queue_depth = max(0, queue_depth)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_depth
+
+    @property
+    def running(self) -> int:
+        """Jobs currently executing on a worker"""
+        return min(self._in_flight, self.workers)
+
+    @property
+    def queued(self) -> int:
+        """Jobs waiting for a free worker"""
+        return max(0, self._in_flight - self.workers)
+
+    def _check_capacity(self):
+        if self._in_flight >= self.capacity:
+            self.rejected += 1
+            raise QueueFullError(
+                f"Inference queue is full ({self.queue_depth} waiting, {self.workers} running)"
+            )
+
+    def _acquire(self):
+        with self._lock:
+            self._check_capacity()
+            self._in_flight += 1
+
+    def ensure_capacity(self):
+        """Raise QueueFullError now if new work would be rejected.
+
+        Lets long-running callers that use call() fail fast before starting.
+        """
+        with self._lock:
+            self._check_capacity()
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+            self.completed += 1
+
+    async def run(self, fn, *args, **kwargs):
+        """Run `fn(*args, **kwargs)` on a worker thread and await its result.
+
+        Raises QueueFullError immediately if the queue is already full.
+        """
+        self._acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+        except Exception:
+            self._release()
+            raise
+        # Release when the work finishes, even if the caller stops waiting
+        future.add_done_callback(lambda _: self._release())
+        return await future
+
+    def call(self, fn, *args, **kwargs):
+        """Run `fn(*args, **kwargs)` on a worker thread from a blocking caller.
+
+        Used by background work, which waits for a free worker instead of
+        being rejected when the queue is full.
+        """
+        with self._lock:
+            self._in_flight += 1
+        try:
+            return self._pool.submit(fn, *args, **kwargs).result()
+        finally:
+            self._release()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "in_flight": self._in_flight,
+            "queued": self.queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
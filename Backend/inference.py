@@ -0,0 +1,133 @@
+"""
+Loading and running the detection model.
+Shared by the API process and the inference worker processes.
+
+The model can run on PyTorch (best.pt as trained) or on an ONNX Runtime /
+OpenVINO graph exported from it. Exported graphs are cached per weights
+hash, and every backend returns the same ultralytics results.
+"""
+
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+from postprocess import empty_detections
+from result_cache import file_fingerprint
+
+# Backend name -> ultralytics export format (None: use the weights directly)
+MODEL_BACKENDS = {
+    "pytorch": None,
+    "onnx": "onnx",
+    "openvino": "openvino",
+}
+
+
+def extract_detections(result) -> np.ndarray:
+    """Convert a YOLO result into an (N, 6) array of class_id, confidence, x1, y1, x2, y2"""
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return empty_detections()
+    # One device-to-host copy for every box; rows are x1, y1, x2, y2, [track id,] conf, cls
+    data = boxes.data.cpu().numpy()
+    return np.column_stack((data[:, -1], data[:, -2], data[:, :4])).astype(np.float64)
+
+
+def run_model(model, images: list, confidence: float, max_batch: int, timings: dict = None) -> list:
+    """Run the model over decoded images, `max_batch` at a time.
+
+    Returns a list aligned with `images` holding `(detections, None)` on
+    success or `(None, error_message)` when prediction failed for that image.
+    If `timings` is given, per-image seconds for the preprocess, inference
+    and postprocess stages are appended to its lists.
+    """
+    outputs = []
+    for i in range(0, len(images), max_batch):
+        batch = images[i:i + max_batch]
+        try:
+            start = time.perf_counter()
+            results = model.predict(batch, conf=float(confidence), verbose=False)
+            elapsed = time.perf_counter() - start
+            batch_timings = {} if timings is not None else None
+            # Only keep the batch once every result converted, so outputs stay aligned with images
+            batch_outputs = [
+                (_detections_timed(result, elapsed / len(batch), batch_timings), None) for result in results
+            ]
+            if len(batch_outputs) != len(batch):
+                raise RuntimeError(f"model returned {len(batch_outputs)} results for {len(batch)} images")
+            outputs.extend(batch_outputs)
+            if timings is not None:
+                for stage, values in batch_timings.items():
+                    timings.setdefault(stage, []).extend(values)
+        except Exception as e:
+            # One bad input fails the whole forward pass - retry one by one
+            # so the error is attributed to the right image
+            print(f"Batched predict failed ({e}), retrying {len(batch)} images individually")
+            for image in batch:
+                try:
+                    start = time.perf_counter()
+                    result = model.predict(image, conf=float(confidence), verbose=False)[0]
+                    elapsed = time.perf_counter() - start
+                    outputs.append((_detections_timed(result, elapsed, timings), None))
+                except Exception as image_error:
+                    outputs.append((None, str(image_error)))
+    return outputs
+
+
+def _detections_timed(result, wall_seconds: float, timings: dict) -> list:
+    """extract_detections, recording this image's stage times in `timings`"""
+    start = time.perf_counter()
+    detections = extract_detections(result)
+    if timings is not None:
+        # ultralytics reports per-image stage times in ms; fall back to wall time
+        speed = getattr(result, "speed", None) or {}
+        stages = {
+            "preprocess": speed.get("preprocess"),
+            "inference": speed.get("inference", wall_seconds * 1000),
+            "postprocess": speed.get("postprocess", 0.0)
+        }
+        stages["postprocess"] += (time.perf_counter() - start) * 1000  # Our own conversion
+        for stage, ms in stages.items():
+            if ms is not None:
+                timings.setdefault(stage, []).append(ms / 1000)
+    return detections
+
+
+def prepare_model(weights_path, backend: str, export_dir, imgsz: int) -> str:
+    """Return the model file to load for `backend`, exporting it if needed.
+
+    Exports go to `export_dir/<backend>-<imgsz>-<weights hash>/`, so new
+    weights get a fresh export and unchanged ones reuse it across restarts.
+    """
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model backend '{backend}'. Use one of: {', '.join(MODEL_BACKENDS)}")
+    export_format = MODEL_BACKENDS[backend]
+    if export_format is None:
+        return str(weights_path)
+
+    weights_hash = file_fingerprint(weights_path)
+    if weights_hash == "missing":
+        raise FileNotFoundError(f"Model weights not found: {weights_path}")
+    target_dir = Path(export_dir) / f"{backend}-{imgsz}-{weights_hash[:16]}"
+    existing = sorted(target_dir.glob("*")) if target_dir.exists() else []
+    if existing:
+        return str(existing[0])
+
+    from ultralytics import YOLO
+    print(f"Exporting {weights_path} to {backend} (first run for these weights)...")
+    exported = Path(YOLO(str(weights_path)).export(format=export_format, imgsz=imgsz, dynamic=True))
+    target_dir.mkdir(parents=True, exist_ok=True)
+    artifact = target_dir / exported.name
+    shutil.move(str(exported), str(artifact))
+    return str(artifact)
+
+
+def load_model(model_file: str, imgsz: int, warmup: bool = True):
+    """Load a .pt / .onnx / OpenVINO model and optionally warm it up"""
+    from ultralytics import YOLO
+    model = YOLO(model_file, task="detect")
+    if warmup:
+        # The first call pays for graph setup and allocations; do it before serving
+        model.predict(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), imgsz=imgsz, verbose=False)
+    return model
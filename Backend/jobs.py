@@ -0,0 +1,199 @@
+"""
+Background batch jobs.
+Submitted images are spooled to a local job directory and processed by a
+worker thread. Progress and results are written next to them, so clients
+poll instead of holding a request open and jobs resume after a restart.
+"""
+
+import json
+import queue
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+
+class JobManager:
+    """Queues jobs and runs them one batch at a time on a worker thread.
+
+    `process_batch(uploads, options)` receives `(filename, data)` pairs and
+    must return one JSON-serialisable result dict per upload, in order.
+    A result with a truthy "error" key counts as failed. Nothing is read
+    or run until `start`.
+    """
+
+    def __init__(self, jobs_dir, process_batch, batch_size: int = 32):
+        self.jobs_dir = Path(jobs_dir)
+        self.process_batch = process_batch
+        self.batch_size = max(1, batch_size)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+
+    def start(self):
+        """Resume jobs from a previous run and start the worker thread"""
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self._load()
+        self._worker = threading.Thread(target=self._run, name="job-worker", daemon=True)
+        self._worker.start()
+
+    # Job files ------------------------------------------------------------
+
+    def _job_dir(self, job_id: str) -> Path:
+        return self.jobs_dir / job_id
+
+    def _save(self, job: dict):
+        path = self._job_dir(job["job_id"]) / "status.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(job))
+        tmp.replace(path)
+
+    def _load(self):
+        """Pick up jobs from a previous run and requeue unfinished ones"""
+        for status_file in sorted(self.jobs_dir.glob("*/status.json")):
+            try:
+                job = json.loads(status_file.read_text())
+            except (OSError, ValueError):
+                continue
+            self._jobs[job["job_id"]] = job
+            if job["status"] in ("queued", "running"):
+                job["status"] = "queued"
+                self._queue.put(job["job_id"])
+
+    # Public API -----------------------------------------------------------
+
+    def create(self, files: list, options: dict) -> dict:
+        """Spool `(filename, file object)` pairs to disk and queue a new job"""
+        job_id = uuid.uuid4().hex[:12]
+        images_dir = self._job_dir(job_id) / "images"
+        images_dir.mkdir(parents=True)
+
+        filenames = []
+        for index, (filename, fileobj) in enumerate(files):
+            with open(images_dir / f"{index:06d}", "wb") as out:
+                shutil.copyfileobj(fileobj, out)
+            filenames.append(filename)
+        (self._job_dir(job_id) / "manifest.json").write_text(json.dumps(filenames))
+
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "total": len(filenames),
+            "processed": 0,
+            "failed": 0,
+            "detections": 0,
+            "options": options,
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "processing_seconds": 0.0,
+            "error": None
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._save(job)
+        self._queue.put(job_id)
+        return self.status(job_id)
+
+    def status(self, job_id: str):
+        """Progress snapshot for a job, or None if it does not exist"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job = dict(job)
+        seconds = job["processing_seconds"]
+        throughput = job["processed"] / seconds if seconds > 0 else 0.0
+        remaining = job["total"] - job["processed"]
+        job["throughput_images_per_sec"] = round(throughput, 2)
+        job["eta_seconds"] = round(remaining / throughput, 1) if throughput > 0 else None
+        job["progress"] = round(job["processed"] / max(job["total"], 1), 4)
+        return job
+
+    def results(self, job_id: str, offset: int = 0, limit: int = 100) -> list:
+        """Results written so far, `limit` at a time starting at `offset`"""
+        path = self._job_dir(job_id) / "results.jsonl"
+        if not path.exists():
+            return []
+        page = []
+        with open(path) as f:
+            for line_number, line in enumerate(f):
+                if line_number < offset:
+                    continue
+                if len(page) >= limit:
+                    break
+                page.append(json.loads(line))
+        return page
+
+    # Worker ---------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._process(job_id)
+            except Exception as e:
+                print(f"Job {job_id} failed: {e}")
+                with self._lock:
+                    job = self._jobs[job_id]
+                    job["status"] = "failed"
+                    job["error"] = str(e)
+                    job["finished_at"] = datetime.now().isoformat()
+                    self._save(job)
+
+    def _process(self, job_id: str):
+        job_dir = self._job_dir(job_id)
+        filenames = json.loads((job_dir / "manifest.json").read_text())
+        results_path = job_dir / "results.jsonl"
+
+        # Resume after a restart: results already on disk are not redone
+        done = 0
+        if results_path.exists():
+            with open(results_path) as f:
+                done = sum(1 for _ in f)
+
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = "running"
+            job["processed"] = done
+            job["started_at"] = job["started_at"] or datetime.now().isoformat()
+            self._save(job)
+        options = job["options"]
+
+        with open(results_path, "a") as results_file:
+            for start in range(done, len(filenames), self.batch_size):
+                end = min(start + self.batch_size, len(filenames))
+                uploads = [
+                    (filenames[i], (job_dir / "images" / f"{i:06d}").read_bytes())
+                    for i in range(start, end)
+                ]
+                batch_start = time.perf_counter()
+                results = self.process_batch(uploads, options)
+                for result in results:
+                    results_file.write(json.dumps(result) + "\n")
+                results_file.flush()
+
+                with self._lock:
+                    job["processed"] += len(results)
+                    job["failed"] += sum(1 for r in results if r.get("error"))
+                    job["detections"] += sum(r.get("detections_count", 0) for r in results)
+                    job["processing_seconds"] += time.perf_counter() - batch_start
+                    self._save(job)
+
+        # Spooled images are no longer needed once every result is written
+        shutil.rmtree(job_dir / "images", ignore_errors=True)
+        with self._lock:
+            job["status"] = "completed"
+            job["finished_at"] = datetime.now().isoformat()
+            self._save(job)
+        print(f"Job {job_id} completed: {job['processed']} images, {job['failed']} failed")
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"queued": self._queue.qsize(), "jobs_by_status": counts}
@@ -0,0 +1,143 @@
+"""
+In-process metrics for the detection pipeline, exposed in the Prometheus
+text format by GET /metrics. Kept dependency-free: a handful of counters,
+histograms and callback gauges is all the API needs.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; covers sub-millisecond decodes up to multi-second CPU batches
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_text(labels: tuple) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + pairs + "}"
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms keyed by name + labels.
+
+    Gauges are callbacks evaluated at scrape time, so values such as queue
+    depth are always current without being pushed by the code that owns them.
+    """
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._help = {}  # name -> (type, help)
+        self._counters = {}  # name -> {labels: value}
+        self._histograms = {}  # name -> {labels: _Histogram}
+        self._gauges = {}  # name -> callback returning {labels: value}
+
+    def counter(self, name: str, help_text: str):
+        self._help[name] = ("counter", help_text)
+        self._counters.setdefault(name, {})
+
+    def histogram(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS):
+        self._help[name] = ("histogram", help_text)
+        self._histograms.setdefault(name, {})
+        self._histograms[name][None] = buckets  # Bucket layout for new label sets
+
+    def gauge(self, name: str, help_text: str, callback):
+        """`callback()` returns a number or a {labels tuple: number} dict"""
+        self._help[name] = ("gauge", help_text)
+        self._gauges[name] = callback
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(series[None])
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Observe the wall time of a `with` block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def mean(self, name: str, **labels):
+        """Mean of a histogram series, or None if nothing was observed"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            histogram = self._histograms.get(name, {}).get(key)
+            if histogram is None or histogram.count == 0:
+                return None
+            return histogram.sum / histogram.count
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, (metric_type, help_text) in self._help.items():
+                if metric_type == "gauge":
+                    continue  # Rendered below
+                full_name = self.prefix + name
+                lines.append(f"# HELP {full_name} {help_text}")
+                lines.append(f"# TYPE {full_name} {metric_type}")
+                if metric_type == "counter":
+                    for labels, value in self._counters[name].items():
+                        lines.append(f"{full_name}{_label_text(labels)} {value}")
+                elif metric_type == "histogram":
+                    for labels, histogram in self._histograms[name].items():
+                        if labels is None:
+                            continue
+                        cumulative = 0
+                        for bound, count in zip(histogram.buckets, histogram.counts):
+                            cumulative += count
+                            le = labels + (("le", repr(float(bound))),)
+                            lines.append(f"{full_name}_bucket{_label_text(le)} {cumulative}")
+                        inf = labels + (("le", "+Inf"),)
+                        lines.append(f"{full_name}_bucket{_label_text(inf)} {histogram.count}")
+                        lines.append(f"{full_name}_sum{_label_text(labels)} {histogram.sum}")
+                        lines.append(f"{full_name}_count{_label_text(labels)} {histogram.count}")
+        # Gauges call back into other components, so read them outside the lock
+        for name, callback in list(self._gauges.items()):
+            full_name = self.prefix + name
+            try:
+                value = callback()
+            except Exception as e:
+                print(f"Metric {full_name} failed: {e}")
+                continue
+            if not isinstance(value, dict):
+                value = {(): value}
+            lines.append(f"# HELP {full_name} {self._help[name][1]}")
+            lines.append(f"# TYPE {full_name} gauge")
+            for labels, number in value.items():
+                lines.append(f"{full_name}{_label_text(labels)} {number}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,104 @@
+"""
+Near-duplicate detection with perceptual hashes.
+Each image gets a 64-bit difference hash (dHash) of a tiny grayscale copy:
+it ignores sensor noise, compression and uniform lighting changes, so
+consecutive captures of the same scene land within a few bits of each
+other. Recent hashes are kept with their detections so a close match can
+reuse them instead of running the model.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def image_signature(image: np.ndarray) -> int:
+    """64-bit dHash of a BGR image: brighter-than-right-neighbour bits of a 9x8 thumbnail"""
+    import cv2
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).reshape(-1)
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def hamming_distances(signatures: np.ndarray, signature: int) -> np.ndarray:
+    """Bit differences between one signature and an array of uint64 signatures"""
+    xor = np.bitwise_xor(signatures, np.uint64(signature))
+    return np.unpackbits(xor.view(np.uint8)).reshape(-1, 64).sum(axis=1)
+
+
+class _Ring:
+    """Fixed-size ring of (signature, detections), newest overwriting oldest"""
+
+    def __init__(self, size: int):
+        self.signatures = np.zeros(size, dtype=np.uint64)
+        self.detections = [None] * size
+        self.count = 0
+        self.next = 0
+
+    def add(self, signature: int, detections: np.ndarray):
+        self.signatures[self.next] = signature
+        self.detections[self.next] = detections
+        self.next = (self.next + 1) % len(self.detections)
+        self.count = min(self.count + 1, len(self.detections))
+
+
+class NearDuplicateIndex:
+    """Recent image signatures and their detections.
+
+    Entries are grouped by a context (model, confidence and image size) and
+    only matched within it, so reused boxes always fit the image. Each
+    context keeps its `max_entries` most recent images; the least recently
+    used contexts are dropped beyond `max_contexts`.
+    """
+
+    def __init__(self, max_entries: int, max_contexts: int = 64):
+        self.max_entries = max(1, max_entries)
+        self.max_contexts = max_contexts
+        self._lock = threading.Lock()
+        self._contexts = OrderedDict()
+        self.reused = 0
+        self.unique = 0
+
+    def find(self, context, signature: int, max_distance: int):
+        """(detections, distance) of the closest recent match within max_distance, or None"""
+        with self._lock:
+            ring = self._contexts.get(context)
+            if ring is None or ring.count == 0:
+                return None
+            self._contexts.move_to_end(context)
+            distances = hamming_distances(ring.signatures[:ring.count], signature)
+            best = int(np.argmin(distances))
+            if distances[best] > max_distance:
+                return None
+            return ring.detections[best], int(distances[best])
+
+    def add(self, context, signature: int, detections: np.ndarray):
+        with self._lock:
+            ring = self._contexts.get(context)
+            if ring is None:
+                ring = self._contexts[context] = _Ring(self.max_entries)
+                while len(self._contexts) > self.max_contexts:
+                    self._contexts.popitem(last=False)
+            self._contexts.move_to_end(context)
+            ring.add(signature, detections)
+
+    def record(self, reused: bool):
+        with self._lock:
+            if reused:
+                self.reused += 1
+            else:
+                self.unique += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = sum(ring.count for ring in self._contexts.values())
+            checked = self.reused + self.unique
+            return {
+                "entries": entries,
+                "contexts": len(self._contexts),
+                "reused": self.reused,
+                "checked": checked,
+                "reuse_rate": round(self.reused / checked, 3) if checked else 0.0
+            }
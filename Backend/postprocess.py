@@ -0,0 +1,78 @@
+"""
+Shared formatting of detections for API responses.
+Detections travel through the pipeline (model output, result cache,
+near-duplicate index, tiling, rendering) as one (N, 6) float array per image
+with the columns below. Every endpoint reports them through these helpers,
+so rounding and field names are the same everywhere; per-box dicts are only
+built for the row-oriented layout.
+"""
+
+import numpy as np
+
+COLUMNS = ("class_id", "confidence", "x1", "y1", "x2", "y2")
+
+
+def empty_detections() -> np.ndarray:
+    return np.zeros((0, len(COLUMNS)), dtype=np.float64)
+
+
+def detections_to_array(detections) -> np.ndarray:
+    """(N, 6) array of class_id, confidence, x1, y1, x2, y2 from an array or nested lists.
+
+    Arrays pass through without a copy; lists come from JSON (the result
+    cache's SQLite tier, render specs).
+    """
+    return np.asarray(detections, dtype=np.float64).reshape(-1, len(COLUMNS))
+
+
+def class_counts(class_ids: np.ndarray, class_names: dict) -> dict:
+    """Count detections per class name from an array of class ids"""
+    if len(class_ids) == 0:
+        return {}
+    counts = np.bincount(class_ids.astype(np.int64))
+    return {
+        class_names.get(class_id, f"Class_{class_id}"): int(counts[class_id])
+        for class_id in np.flatnonzero(counts).tolist()
+    }
+
+
+def format_detections(
+    detections: np.ndarray,
+    class_names: dict,
+    columnar: bool = False,
+    include_bbox: bool = True,
+    limit: int = None
+):
+    """Detections as a list of dicts, or as parallel arrays when `columnar`.
+
+    Confidence is rounded to 3 decimals and box corners to 2. Returns
+    `(formatted, class_counts)`; counts always cover every detection even
+    when `limit` truncates the formatted list.
+    """
+    array = detections_to_array(detections)
+    class_ids = array[:, 0].astype(np.int64)
+    counts = class_counts(class_ids, class_names)
+    if limit is not None:
+        array = array[:limit]
+        class_ids = class_ids[:limit]
+    confidences = np.round(array[:, 1], 3).tolist()
+    boxes = np.round(array[:, 2:6], 2)
+
+    if columnar:
+        formatted = {"class_id": class_ids.tolist(), "confidence": confidences}
+        if include_bbox:
+            for column, name in enumerate(COLUMNS[2:]):
+                formatted[name] = boxes[:, column].tolist()
+        return formatted, counts
+
+    formatted = []
+    for row, (class_id, confidence) in enumerate(zip(class_ids.tolist(), confidences)):
+        det = {
+            "class": class_names.get(class_id, f"Class_{class_id}"),
+            "class_id": class_id,
+            "confidence": confidence
+        }
+        if include_bbox:
+            det["bbox"] = boxes[row].tolist()
+        formatted.append(det)
+    return formatted, counts
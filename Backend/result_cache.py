@@ -0,0 +1,143 @@
+"""
+Content-hash keyed cache of detection results.
+In-memory LRU bounded by approximate size, with an optional SQLite tier
+that survives restarts.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 hex digest of raw image bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_fingerprint(path) -> str:
+    """SHA-256 of a file on disk (e.g. model weights), or 'missing'"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+    except OSError:
+        return "missing"
+    return digest.hexdigest()
+
+
+def _json_default(value):
+    """Store numpy arrays (e.g. detections) as nested lists"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
+
+
+class ResultCache:
+    """LRU cache of JSON-serialisable result entries; max_bytes=0 disables it.
+
+    Entries may hold numpy arrays; they come back as lists when read from
+    the SQLite tier.
+    """
+
+    def __init__(self, max_bytes: int, db_path=None):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (entry, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.db_path = db_path if max_bytes else None
+        self._db = None  # Opened on first use, so creating the cache touches no files
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(digest: str, confidence: float, fingerprint: str) -> str:
+        """Key for an image hash, confidence and model fingerprint.
+
+        Only the first 16 characters of the fingerprint are kept, so
+        fingerprints must differ there (pass a hash, not a composite string).
+        """
+        return f"{fingerprint[:16]}:{float(confidence):.4f}:{digest}"
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _connection(self):
+        """The SQLite tier (None without db_path); call with the lock held"""
+        if self._db is None and self.db_path:
+            self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def get(self, key: str):
+        if not self.enabled:
+            return None
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return item[0]
+            db = self._connection()
+            if db is not None:
+                row = db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self._insert(key, json.loads(row[0]), len(row[0]))
+                    return self._entries[key][0]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, entry: dict):
+        self.put_many([(key, entry)])
+
+    def put_many(self, items: list):
+        """Store `(key, entry)` pairs, with one SQLite commit for all of them"""
+        if not items or not self.enabled:
+            return
+        values = [(key, entry, json.dumps(entry, default=_json_default)) for key, entry in items]
+        with self._lock:
+            for key, entry, value in values:
+                self._insert(key, entry, len(value))
+            db = self._connection()
+            if db is not None:
+                db.executemany(
+                    "INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)",
+                    [(key, value) for key, _, value in values]
+                )
+                db.commit()
+
+    def _insert(self, key: str, entry: dict, size: int):
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (entry, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "memory_bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "persistent": self.db_path is not None,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,67 @@
+"""
+Response encoding for the prediction endpoints.
+JSON is encoded with orjson (falling back to the standard library when it
+is not installed); clients that send `Accept: application/msgpack` get
+MessagePack instead, which is smaller and cheaper to produce and parse.
+"""
+
+import json
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional: only needed for MessagePack responses
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+
+def dumps_json(content) -> bytes:
+    if orjson is not None:
+        # Non-str keys (e.g. class id -> name maps) become strings, as with json
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_msgpack(content) -> bytes:
+    return msgpack.packb(content, use_bin_type=True)
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with orjson when available"""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps_json(content)
+
+
+class MsgPackResponse(Response):
+    media_type = "application/msgpack"
+
+    def render(self, content) -> bytes:
+        return dumps_msgpack(content)
+
+
+def wants_msgpack(request: Request) -> bool:
+    """True when the client asked for MessagePack and the server can produce it"""
+    accept = request.headers.get("accept", "")
+    return msgpack is not None and any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+
+def negotiated_response(content, request: Request, status_code: int = 200) -> Response:
+    """Encode an endpoint result as MessagePack or JSON according to Accept.
+
+    Returning the Response directly also skips FastAPI's jsonable_encoder
+    pass over the (already plain) result.
+    """
+    if wants_msgpack(request):
+        return MsgPackResponse(content, status_code=status_code)
+    return FastJSONResponse(content, status_code=status_code)
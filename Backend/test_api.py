@@ -65,7 +65,7 @@ def test_health():
             data = response.json()
             print_success("Health check passed!")
             print_info(f"Status: {data.get('status')}")
-            print_info(f"Model loaded: {data.get('model_loaded')}")
+            print_info(f"Model loaded: {data.get('model_loaded')} ({data.get('model_status')})")
             return True
         else:
             print_error(f"Health check failed with status: {response.status_code}")
@@ -0,0 +1,10 @@
+"""
+Unit and API tests, run with `python -m pytest Backend/tests`.
+The backend modules are flat files in Backend/, imported the way app.py
+imports them.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
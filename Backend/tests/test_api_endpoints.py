@@ -0,0 +1,160 @@
+"""
+End-to-end tests of the API through FastAPI's test client.
+The model is the benchmark's StubModel: uniform images of value v get
+v % 5 boxes, in a few milliseconds. Uploads and jobs go to a temporary
+directory.
+"""
+
+import hashlib
+import io
+import json
+import time
+import zipfile
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("httpx")  # Needed by the test client
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+def png(value: int, size: int = 32) -> bytes:
+    return cv2.imencode(".png", np.full((size, size, 3), value, np.uint8))[1].tobytes()
+
+
+@pytest.fixture(scope="module")
+def api(tmp_path_factory):
+    import app
+    from benchmark import StubModel
+
+    def load_stub_model():
+        app.model = StubModel(1)
+        app.model_fingerprint = hashlib.sha256(b"stub").hexdigest()
+        app.model_state["status"] = "ready"
+        app.model_loaded.set()
+
+    root = tmp_path_factory.mktemp("api")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(root)  # The upload store lives under ./uploads
+        patch.setattr(app.job_manager, "jobs_dir", root / "jobs")
+        patch.setattr(app, "load_model_in_background", load_stub_model)
+        with TestClient(app.app) as client:
+            app.model_loaded.wait(5)
+            yield app, client
+
+
+def test_ready(api):
+    app, client = api
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+
+
+def test_not_ready_while_loading(api, monkeypatch):
+    app, client = api
+    monkeypatch.setitem(app.model_state, "status", "loading")
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    assert client.get("/health").json()["model_status"] == "loading"
+
+
+def test_metrics_count_images_and_objects(api):
+    app, client = api
+    response = client.post("/predict/single", files={"file": ("m.png", png(3), "image/png")})
+    assert response.json()["detections_count"] == 3
+    text = client.get("/metrics").text
+    assert 'detection_images_total{result="detected"}' in text
+    assert "detection_objects_total{class=" in text
+    assert 'detection_stage_seconds_count{stage="inference"}' in text
+
+
+def test_lookup_returns_cached_results(api):
+    app, client = api
+    data = png(4)
+    client.post("/predict/batch-chunked", files=[("files", ("l.png", data, "image/png"))])
+    known = hashlib.sha256(data).hexdigest()
+    unknown = hashlib.sha256(b"never uploaded").hexdigest()
+
+    response = client.post("/predict/lookup", json={"hashes": [known, unknown], "confidence": 0.25})
+    body = response.json()
+    assert response.status_code == 200
+    assert list(body["found"]) == [known]
+    assert body["found"][known]["detections_count"] == 4
+    assert body["missing"] == [unknown]
+
+    # Another confidence is another cache entry
+    response = client.post("/predict/lookup", json={"hashes": [known], "confidence": 0.5})
+    assert response.json()["missing"] == [known]
+
+
+def test_lookup_rejects_bad_hashes(api):
+    app, client = api
+    response = client.post("/predict/lookup", json={"hashes": ["not-a-hash"]})
+    assert response.status_code == 400
+
+
+def test_archive(api):
+    app, client = api
+    sink = io.BytesIO()
+    with zipfile.ZipFile(sink, "w") as archive:
+        archive.writestr("images/a.png", png(1))
+        archive.writestr("images/b.png", png(2))
+        archive.writestr("notes.txt", b"not an image")
+    response = client.post("/predict/archive", content=sink.getvalue())
+    body = response.json()
+    assert response.status_code == 200
+    assert [image["filename"] for image in body["images"]] == ["a.png", "b.png"]
+    assert body["total_detections"] == 3
+    assert body["skipped_members"] == 1
+
+
+def test_archive_rejects_garbage(api):
+    app, client = api
+    assert client.post("/predict/archive", content=b"PK\x03\x04garbage").status_code == 400
+
+
+def test_stream_ndjson(api):
+    app, client = api
+    files = [("files", (f"s{i}.png", png(i + 10), "image/png")) for i in range(3)]
+    response = client.post("/predict/batch-chunked", files=files, params={"stream": "ndjson", "chunk_size": 2})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["type"] for record in records] == ["result", "result", "result", "summary"]
+    assert [record["filename"] for record in records[:3]] == ["s0.png", "s1.png", "s2.png"]
+    assert [record["detections_count"] for record in records[:3]] == [0, 1, 2]
+
+
+def test_stream_sse(api):
+    app, client = api
+    files = [("files", ("e.png", png(13), "image/png"))]
+    response = client.post("/predict/batch-chunked", files=files, params={"stream": "sse"})
+    events = [line for line in response.text.splitlines() if line.startswith("event: ")]
+    assert events == ["event: result", "event: summary"]
+
+
+def test_job_runs_to_completion(api):
+    app, client = api
+    files = [("files", (f"j{i}.png", png(i + 20), "image/png")) for i in range(3)]
+    response = client.post("/jobs", files=files)
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    deadline = time.monotonic() + 10
+    while client.get(f"/jobs/{job_id}").json()["status"] != "completed":
+        assert time.monotonic() < deadline, "job did not finish"
+        time.sleep(0.05)
+
+    results = client.get(f"/jobs/{job_id}/results").json()
+    assert [result["filename"] for result in results["results"]] == ["j0.png", "j1.png", "j2.png"]
+    assert results["next_offset"] is None
+    # Job renders are made while the job runs
+    link = results["results"][0]["annotated_image"]
+    assert link and client.get(link).status_code == 200
+
+
+def test_unknown_job(api):
+    app, client = api
+    assert client.get("/jobs/does-not-exist").status_code == 404
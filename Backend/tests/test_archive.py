@@ -0,0 +1,87 @@
+import io
+import struct
+import zipfile
+
+import pytest
+
+from archive import ArchiveError, iter_archive_members
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 8
+
+
+class _Unseekable(io.RawIOBase):
+    """Write-only sink: zipfile falls back to data descriptors on it"""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+
+def make_zip(members, compression=zipfile.ZIP_DEFLATED, streamed=False) -> bytes:
+    sink = _Unseekable() if streamed else io.BytesIO()
+    with zipfile.ZipFile(sink, "w", compression) as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return (sink.buffer if streamed else sink).getvalue()
+
+
+def read_members(data: bytes, max_member_bytes: int = 1 << 20) -> list:
+    return list(iter_archive_members(io.BytesIO(data), max_member_bytes))
+
+
+@pytest.mark.parametrize("compression", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+def test_zip_members_in_order(compression):
+    data = make_zip([("a.png", PNG_BYTES), ("b/c.jpg", b"jpeg")], compression)
+    assert read_members(data) == [("a.png", PNG_BYTES), ("b/c.jpg", b"jpeg")]
+
+
+def test_zip_with_data_descriptors():
+    data = make_zip([("a.png", PNG_BYTES), ("b.png", b"second")], streamed=True)
+    flags = struct.unpack("<H", data[6:8])[0]
+    assert flags & 0x08
+    assert read_members(data) == [("a.png", PNG_BYTES), ("b.png", b"second")]
+
+
+def test_zip_skips_directories():
+    sink = io.BytesIO()
+    with zipfile.ZipFile(sink, "w") as archive:
+        archive.mkdir("images")
+        archive.writestr("images/a.png", PNG_BYTES)
+    assert read_members(sink.getvalue()) == [("images/a.png", PNG_BYTES)]
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_zip_oversized_member_is_skipped(streamed):
+    data = make_zip([("big.png", PNG_BYTES), ("small.png", b"ok")], streamed=streamed)
+    assert read_members(data, max_member_bytes=100) == [("big.png", None), ("small.png", b"ok")]
+
+
+def test_zip_encrypted_member_is_rejected():
+    data = bytearray(make_zip([("a.png", PNG_BYTES)]))
+    flags = struct.unpack("<H", data[6:8])[0]
+    data[6:8] = struct.pack("<H", flags | 0x01)
+    with pytest.raises(ArchiveError, match="Encrypted"):
+        read_members(bytes(data))
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_zip_truncated_member(streamed):
+    data = make_zip([("a.png", PNG_BYTES)], streamed=streamed)
+    with pytest.raises(ArchiveError):
+        read_members(data[:60])
+
+
+def test_tar_members():
+    import tarfile
+    sink = io.BytesIO()
+    with tarfile.open(fileobj=sink, mode="w:gz") as archive:
+        for name, payload in (("a.png", PNG_BYTES), ("b.png", b"b")):
+            info = tarfile.TarInfo(name)
+            info.size = len(payload)
+            archive.addfile(info, io.BytesIO(payload))
+    assert read_members(sink.getvalue(), max_member_bytes=100) == [("a.png", None), ("b.png", b"b")]
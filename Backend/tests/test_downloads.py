@@ -0,0 +1,54 @@
+import pytest
+
+from downloads import etag_matches, parse_range
+
+ETAG = '"abc123"'
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),  # Open-ended
+    ("bytes=-200", (800, 999)),  # Suffix: the last 200 bytes
+    ("bytes=-5000", (0, 999)),  # Suffix longer than the file
+    ("bytes=900-5000", (900, 999)),  # End clamped to the file
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", [
+    None,
+    "",
+    "items=0-10",
+    "bytes=0-10,20-30",  # Multi-range: served whole
+    "bytes=abc-",
+    "bytes=50-10",  # Last byte before the first
+    "bytes=-",
+])
+def test_parse_range_ignored(header):
+    assert parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", 1000),
+    ("bytes=5000-6000", 1000),
+    ("bytes=-0", 1000),
+    ("bytes=-10", 0),
+])
+def test_parse_range_unsatisfiable(header, size):
+    with pytest.raises(ValueError):
+        parse_range(header, size)
+
+
+@pytest.mark.parametrize("header, expected", [
+    (ETAG, True),
+    (f"W/{ETAG}", True),  # Weak comparison
+    (f'"other", {ETAG}', True),
+    ("*", True),
+    (' * ', True),
+    ('"other"', False),
+    ("", False),
+    (None, False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, ETAG) is expected
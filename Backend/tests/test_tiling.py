@@ -0,0 +1,74 @@
+import numpy as np
+
+from tiling import TileOptions, merge_detections, offset_detections, tile_windows
+
+
+def detections(*rows) -> np.ndarray:
+    """(N, 6) array of class_id, confidence, x1, y1, x2, y2"""
+    return np.array(rows, dtype=np.float64).reshape(-1, 6)
+
+
+def test_small_image_is_one_tile():
+    assert tile_windows(300, 400, 640, 0.2) == [(0, 0, 400, 300)]
+
+
+def test_windows_cover_the_image_with_overlap():
+    windows = tile_windows(1000, 1500, 640, 0.2)
+    assert windows == [
+        (0, 0, 640, 640), (512, 0, 1152, 640), (860, 0, 1500, 640),
+        (0, 360, 640, 1000), (512, 360, 1152, 1000), (860, 360, 1500, 1000),
+    ]
+    # Neighbours share at least the requested overlap
+    xs = sorted({x1 for x1, _, _, _ in windows})
+    assert all(640 - (b - a) >= 0.2 * 640 for a, b in zip(xs, xs[1:]))
+
+
+def test_edge_tiles_are_flush_and_full_size():
+    for x1, y1, x2, y2 in tile_windows(1000, 1500, 640, 0.2):
+        assert x2 - x1 == 640 and y2 - y1 == 640
+        assert x2 <= 1500 and y2 <= 1000
+    assert max(x2 for _, _, x2, _ in tile_windows(1000, 1500, 640, 0.2)) == 1500
+
+
+def test_offset_detections():
+    tile = detections([1, 0.9, 10, 20, 30, 40])
+    shifted = offset_detections(tile, 100, 200)
+    assert shifted.tolist() == [[1, 0.9, 110, 220, 130, 240]]
+    assert tile.tolist() == [[1, 0.9, 10, 20, 30, 40]]  # Input untouched
+
+
+def test_merge_cut_box_into_union():
+    # Left tile sees part of the object, the next tile sees all of it
+    merged = merge_detections(detections(
+        [3, 0.9, 600, 10, 640, 50],
+        [3, 0.7, 590, 10, 660, 50],
+    ), 0.5)
+    assert merged.tolist() == [[3, 0.9, 590, 10, 660, 50]]
+
+
+def test_merge_keeps_other_classes_and_distant_boxes():
+    merged = merge_detections(detections(
+        [3, 0.9, 600, 10, 640, 50],
+        [5, 0.6, 600, 10, 640, 50],  # Same place, other class
+        [3, 0.8, 10, 10, 20, 20],  # Same class, elsewhere
+    ), 0.5)
+    assert merged[:, 1].tolist() == [0.9, 0.8, 0.6]  # Highest confidence first
+    assert len(merged) == 3
+
+
+def test_merge_uses_intersection_over_smaller_box():
+    # IoU is only 0.25 but the small box lies inside the large one
+    merged = merge_detections(detections(
+        [0, 0.5, 0, 0, 100, 100],
+        [0, 0.9, 0, 0, 50, 50],
+    ), 0.5)
+    assert merged.tolist() == [[0, 0.9, 0, 0, 100, 100]]
+
+
+def test_merge_empty():
+    assert merge_detections(detections(), 0.5).shape == (0, 6)
+
+
+def test_tile_options_tag():
+    assert TileOptions(640, 0.2, 16, True).tag == "tile640-20-full"
+    assert TileOptions(512, 0.0, 8, False).tag == "tile512-00"
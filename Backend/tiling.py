@@ -0,0 +1,88 @@
+"""
+Tiled (sliced) inference for high-resolution images.
+A large image letterboxed to the model input size shrinks small objects to
+a few pixels. Tiled mode cuts it into overlapping tiles at about the model
+resolution instead, runs every tile through the model, shifts each tile's
+boxes back into image coordinates and merges the boxes that were found
+twice where tiles overlap.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+
+class TileOptions(NamedTuple):
+    """How a request tiles its images"""
+    size: int  # Tile side in pixels
+    overlap: float  # Fraction of a tile shared with each neighbour
+    batch_size: int  # Tiles per forward pass
+    full_image: bool  # Also run the whole image, for objects larger than a tile
+
+    @property
+    def tag(self) -> str:
+        """Short id of the settings that change detections (not batch_size)"""
+        return f"tile{self.size}-{round(self.overlap * 100):02d}{'-full' if self.full_image else ''}"
+
+
+def tile_starts(length: int, tile_size: int, overlap: float) -> list:
+    """Start offsets along one axis; the last tile ends flush with the edge"""
+    if length <= tile_size:
+        return [0]
+    step = max(1, int(tile_size * (1 - overlap)))
+    return list(range(0, length - tile_size, step)) + [length - tile_size]
+
+
+def tile_windows(height: int, width: int, tile_size: int, overlap: float) -> list:
+    """(x1, y1, x2, y2) windows covering an image, row by row"""
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in tile_starts(height, tile_size, overlap)
+        for x in tile_starts(width, tile_size, overlap)
+    ]
+
+
+def offset_detections(detections: np.ndarray, x: int, y: int) -> np.ndarray:
+    """Shift detection boxes from tile to image coordinates"""
+    if not x and not y:
+        return detections
+    shifted = detections.copy()
+    shifted[:, 2:6] += (x, y, x, y)
+    return shifted
+
+
+def merge_detections(detections: np.ndarray, threshold: float) -> np.ndarray:
+    """Greedy cross-tile merging of same-class boxes, highest confidence first.
+
+    Overlap is measured as intersection over the smaller box, so an object
+    cut off at a tile edge still matches the whole box from the next tile;
+    matched boxes are merged into their union (keeping the best confidence)
+    rather than dropped.
+    """
+    if len(detections) < 2:
+        return detections
+    classes = detections[:, 0]
+    boxes = detections[:, 2:6]
+    areas = np.clip(boxes[:, 2] - boxes[:, 0], 0, None) * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+    done = np.zeros(len(detections), dtype=bool)
+
+    merged = []
+    for i in np.argsort(-detections[:, 1], kind="stable"):
+        if done[i]:
+            continue
+        done[i] = True
+        row = detections[i].copy()
+        box = row[2:6]  # View: updates row
+        candidates = np.flatnonzero(~done & (classes == classes[i]))
+        if candidates.size:
+            others = boxes[candidates]
+            width = np.clip(np.minimum(box[2], others[:, 2]) - np.maximum(box[0], others[:, 0]), 0, None)
+            height = np.clip(np.minimum(box[3], others[:, 3]) - np.maximum(box[1], others[:, 1]), 0, None)
+            smaller = np.maximum(np.minimum(areas[i], areas[candidates]), 1e-9)
+            group = candidates[width * height / smaller >= threshold]
+            if group.size:
+                done[group] = True
+                box[:2] = np.minimum(box[:2], boxes[group, :2].min(axis=0))
+                box[2:] = np.maximum(box[2:], boxes[group, 2:].max(axis=0))
+        merged.append(row)
+    return np.stack(merged)
@@ -0,0 +1,240 @@
+"""
+Content-addressed storage for uploaded originals and annotated renders.
+Files are named by the SHA-256 of the image and sharded into two levels of
+subdirectories, so identical uploads are stored once and uploads that share
+a filename never overwrite each other. A background janitor keeps the store
+under a size cap (least recently used first) and drops files past a maximum
+age, so eviction I/O never runs on the request path.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+ORIGINALS = "originals"
+ANNOTATED = "annotated"
+PENDING_SUFFIX = ".pending.json"  # What to draw for a render not yet made
+
+
+class UploadStore:
+    """Sharded, deduplicating file store with LRU / age-based eviction.
+
+    Paths are returned relative to the working directory (e.g.
+    uploads/originals/ab/cd/<hash>.png) so they can be used in /download links.
+    """
+
+    def __init__(self, root, max_bytes: int, max_age_seconds=None, janitor_interval_s: float = 60,
+                 on_evict=None):
+        self.root = str(root)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.janitor_interval_s = janitor_interval_s
+        self.on_evict = on_evict  # Called with each deleted path
+        self._lock = threading.Lock()
+        self._files = OrderedDict()  # path -> (size, last access time), least recent first
+        self._bytes = 0
+        self.deduplicated = 0
+        self.evicted = 0
+        self.evicted_bytes = 0
+        self._stop = threading.Event()
+        self._scanned = threading.Event()
+        self._janitor = None
+
+    # Paths ----------------------------------------------------------------
+
+    def _sharded(self, kind: str, name: str) -> str:
+        return f"{self.root}/{kind}/{name[:2]}/{name[2:4]}/{name}"
+
+    def contains(self, path: str) -> bool:
+        """True if `path` resolves to a file inside the store's directories"""
+        resolved = os.path.realpath(path)
+        if resolved.endswith(".tmp") or resolved.endswith(PENDING_SUFFIX):
+            return False  # Write in progress, or internal render spec
+        for kind in (ORIGINALS, ANNOTATED):
+            directory = os.path.realpath(os.path.join(self.root, kind))
+            if os.path.commonpath([resolved, directory]) == directory and resolved != directory:
+                return True
+        return False
+
+    def original_path(self, digest: str, extension: str) -> str:
+        return self._sharded(ORIGINALS, f"{digest}{extension.lower()}")
+
+    def annotated_path(self, digest: str, variant: str, extension: str) -> str:
+        """Render of `digest` for one model + confidence combination (`variant`)"""
+        return self._sharded(ANNOTATED, f"{digest}_{variant}{extension.lower()}")
+
+    def pending_path(self, annotated_path: str) -> str:
+        """Where the spec for a not yet rendered annotated image is kept"""
+        return f"{annotated_path}{PENDING_SUFFIX}"
+
+    def find_original(self, digest: str):
+        """Path of the stored original for a content hash, whatever its extension"""
+        directory = os.path.dirname(self.original_path(digest, ""))
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return None
+        for name in names:
+            if name.startswith(digest) and not name.endswith(".tmp"):
+                return f"{directory}/{name}"
+        return None
+
+    # Files ----------------------------------------------------------------
+
+    def put_original(self, digest: str, extension: str, data: bytes) -> str:
+        """Store upload bytes once per content hash and return the path"""
+        path = self.original_path(digest, extension)
+        if os.path.exists(path):
+            self.deduplicated += 1
+            self.touch(path)
+            return path
+        self._write(path, data)
+        return path
+
+    def put_pending(self, annotated_path: str, data: bytes):
+        """Store the spec of a lazy render so it can be drawn after a restart"""
+        self._write(self.pending_path(annotated_path), data)
+
+    def read_pending(self, annotated_path: str):
+        """Bytes of a lazy render's spec, or None if there is none"""
+        try:
+            with open(self.pending_path(annotated_path), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def discard(self, path: str):
+        """Delete a stored file and stop tracking it"""
+        with self._lock:
+            entry = self._files.pop(path, None)
+            if entry is not None:
+                self._bytes -= entry[0]
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _write(self, path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so concurrent readers never see a partial file
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self.track(path, len(data))
+
+    def track(self, path: str, size: int = None):
+        """Record a file written into the store (e.g. an annotated render)"""
+        if size is None:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                return
+        with self._lock:
+            previous = self._files.pop(path, None)
+            if previous is not None:
+                self._bytes -= previous[0]
+            self._files[path] = (size, time.time())
+            self._bytes += size
+
+    def touch(self, path: str):
+        """Mark a stored file as recently used"""
+        with self._lock:
+            entry = self._files.pop(path, None)
+            if entry is not None:
+                self._files[path] = (entry[0], time.time())
+                return
+        if os.path.exists(path):
+            self.track(path)
+
+    # Janitor --------------------------------------------------------------
+
+    def start(self):
+        """Index existing files and start evicting in the background"""
+        self._janitor = threading.Thread(target=self._run, name="upload-janitor", daemon=True)
+        self._janitor.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _scan(self):
+        """Index files left from a previous run, oldest modification first"""
+        found = []
+        for kind in (ORIGINALS, ANNOTATED):
+            for dirpath, _, filenames in os.walk(os.path.join(self.root, kind)):
+                for name in filenames:
+                    path = f"{dirpath}/{name}".replace(os.sep, "/")
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    if name.endswith(".tmp"):
+                        os.remove(path)  # Interrupted write
+                        continue
+                    found.append((stat.st_mtime, path, stat.st_size))
+        with self._lock:
+            # Newest first, each moved to the front: the oldest ends up evicted first
+            for mtime, path, size in sorted(found, reverse=True):
+                if path not in self._files:
+                    self._files[path] = (size, mtime)
+                    self._files.move_to_end(path, last=False)
+                    self._bytes += size
+        self._scanned.set()
+
+    def _run(self):
+        self._scan()
+        while not self._stop.is_set():
+            try:
+                self.evict()
+            except Exception as e:
+                print(f"Upload store janitor failed: {e}")
+            self._stop.wait(self.janitor_interval_s)
+
+    def evict(self) -> int:
+        """Delete least recently used files over the size cap and files past the max age"""
+        cutoff = time.time() - self.max_age_seconds if self.max_age_seconds else None
+        victims = []
+        with self._lock:
+            total = self._bytes
+            for path, (size, last_access) in self._files.items():
+                expired = cutoff is not None and last_access < cutoff
+                if not expired and total <= self.max_bytes:
+                    break  # Everything after this is newer and fits
+                victims.append((path, size))
+                total -= size
+            for path, size in victims:
+                del self._files[path]
+                self._bytes -= size
+
+        for path, size in victims:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Could not evict {path}: {e}")
+                continue
+            self.evicted += 1
+            self.evicted_bytes += size
+            if self.on_evict is not None:
+                self.on_evict(path)
+        if victims:
+            print(f"Upload store: evicted {len(victims)} files")
+        return len(victims)
+
+    def stats(self) -> dict:
+        with self._lock:
+            files = len(self._files)
+            total = self._bytes
+        return {
+            "files": files,
+            "size_mb": round(total / (1024 * 1024), 2),
+            "max_size_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "max_age_hours": round(self.max_age_seconds / 3600, 1) if self.max_age_seconds else None,
+            "indexed": self._scanned.is_set(),
+            "deduplicated_uploads": self.deduplicated,
+            "evicted_files": self.evicted,
+            "evicted_mb": round(self.evicted_bytes / (1024 * 1024), 2)
+        }
@@ -0,0 +1,122 @@
+"""
+Frame sampling for uploaded videos.
+The upload is spooled to one temporary file (OpenCV needs a path to open a
+video) and frames are decoded one at a time from it: skipped frames are
+only grabbed, never decoded, and no frame is ever written to disk.
+"""
+
+import os
+import tempfile
+
+
+class VideoError(Exception):
+    """Raised when a video upload cannot be decoded"""
+
+
+class VideoTooLarge(VideoError):
+    """Raised when a video upload exceeds the size limit"""
+
+
+def spool_to_tempfile(stream, suffix: str, max_bytes: int) -> str:
+    """Copy a file-like stream into a temporary file and return its path.
+
+    The caller removes the file. Raises VideoTooLarge past max_bytes.
+    """
+    fd, path = tempfile.mkstemp(prefix="video_", suffix=suffix)
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = stream.read(1024 * 1024)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise VideoTooLarge(f"Video exceeds {max_bytes // (1024 * 1024)}MB")
+                f.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    if not written:
+        os.remove(path)
+        raise VideoError("Empty video upload")
+    return path
+
+
+def sampling_stride(video_fps: float, stride: int = None, target_fps: float = None) -> int:
+    """Frames to advance between samples: an explicit stride, else video fps / target fps"""
+    if stride:
+        return max(1, int(stride))
+    if target_fps and video_fps > 0:
+        return max(1, round(video_fps / target_fps))
+    return 1
+
+
+class VideoFrames:
+    """Sampled frames of a video file as `(frame_index, seconds, BGR frame)`"""
+
+    def __init__(self, path: str, stride: int = None, target_fps: float = None, max_frames: int = None):
+        import cv2
+        self._cv2 = cv2
+        self._capture = cv2.VideoCapture(path)
+        if not self._capture.isOpened():
+            raise VideoError("Unreadable video")
+        self.fps = self._capture.get(cv2.CAP_PROP_FPS) or 0.0
+        self.frame_count = int(self._capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        self.width = int(self._capture.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
+        self.height = int(self._capture.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
+        self.stride = sampling_stride(self.fps, stride, target_fps)
+        self.max_frames = max_frames
+        self.decoded_frames = 0
+        self.truncated = False
+
+    def __iter__(self):
+        index = -1
+        try:
+            while True:
+                # grab() advances without decoding; only sampled frames are retrieved
+                if not self._capture.grab():
+                    return
+                index += 1
+                if index % self.stride:
+                    continue
+                if self.max_frames and self.decoded_frames >= self.max_frames:
+                    self.truncated = True
+                    return
+                ok, frame = self._capture.retrieve()
+                if not ok:
+                    continue
+                self.decoded_frames += 1
+                if self.fps > 0:
+                    seconds = index / self.fps
+                else:
+                    seconds = self._capture.get(self._cv2.CAP_PROP_POS_MSEC) / 1000
+                yield index, seconds, frame
+        finally:
+            self._capture.release()
+
+    def info(self) -> dict:
+        return {
+            "fps": round(self.fps, 3),
+            "frame_count": self.frame_count,
+            "duration_s": round(self.frame_count / self.fps, 3) if self.fps > 0 else None,
+            "width": self.width,
+            "height": self.height,
+            "stride": self.stride,
+            "sampled_frames": self.decoded_frames,
+            "truncated": self.truncated
+        }
+
+
+def summarize_classes(timeline: list) -> dict:
+    """Per class: frames it appears in, first / last time seen and the most at once"""
+    classes = {}
+    for entry in timeline:
+        for name, count in entry.get("class_counts", {}).items():
+            summary = classes.get(name)
+            if summary is None:
+                summary = classes[name] = {"frames": 0, "first_seen_s": entry["time_s"], "max_count": 0}
+            summary["frames"] += 1
+            summary["last_seen_s"] = entry["time_s"]
+            summary["max_count"] = max(summary["max_count"], count)
+    return classes
@@ -0,0 +1,131 @@
+"""
+Multi-process inference for CPU-only hosts.
+Each worker process loads its own model replica with a fixed number of
+intra-op threads, so throughput scales with cores instead of being
+serialised through one Python process.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Set in each worker process by _init_worker
+_worker_model = None
+
+
+def _init_worker(model_file: str, imgsz: int, threads: int):
+    global _worker_model
+    # Must be set before torch is imported in this process
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except Exception:
+        pass
+    import cv2
+    cv2.setNumThreads(1)
+
+    from inference import load_model
+    _worker_model = load_model(model_file, imgsz)
+    print(f"Inference worker {os.getpid()} ready ({threads} threads)")
+
+
+def _ping():
+    return os.getpid()
+
+
+def _predict(images: list, confidence: float, max_batch: int):
+    from inference import run_model
+    start = time.perf_counter()
+    timings = {}
+    outputs = run_model(_worker_model, images, confidence, max_batch, timings)
+    return os.getpid(), time.perf_counter() - start, outputs, timings
+
+
+class InferenceWorkerPool:
+    """Pool of model worker processes.
+
+    `predict` splits a batch across the workers and reassembles the
+    per-image outputs in order.
+    """
+
+    def __init__(self, model_file, imgsz: int, workers: int, threads_per_worker: int, max_batch: int):
+        self.workers = max(1, workers)
+        self.threads_per_worker = max(1, threads_per_worker)
+        self.max_batch = max_batch
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(str(model_file), imgsz, self.threads_per_worker)
+        )
+        self._lock = threading.Lock()
+        self._usage = {}  # pid -> {"tasks", "images", "busy_seconds"}
+        self._started = time.perf_counter()
+
+    def start(self):
+        """Spawn every worker (and load its model) now rather than on first use.
+
+        Spawned workers import the main module first, so it must not start
+        background work at import time (app.py does that in startup hooks).
+        """
+        futures = [self._pool.submit(_ping) for _ in range(self.workers)]
+        pids = [future.result() for future in futures]
+        self._started = time.perf_counter()
+        return pids
+
+    def predict(self, images: list, confidence: float, timings: dict = None, max_batch: int = None) -> list:
+        """Run images across the workers; returns (detections, error) per image.
+
+        Per-image stage times from the workers are merged into `timings`.
+        `max_batch` overrides the images per forward pass for this call.
+        """
+        if not images:
+            return []
+        # Give each worker an equal share so one batch keeps every core busy
+        share = -(-len(images) // self.workers)
+        futures = [
+            self._pool.submit(_predict, images[i:i + share], confidence, max_batch or self.max_batch)
+            for i in range(0, len(images), share)
+        ]
+        outputs = []
+        for future in futures:
+            pid, busy_seconds, part, part_timings = future.result()
+            outputs.extend(part)
+            if timings is not None:
+                for stage, values in part_timings.items():
+                    timings.setdefault(stage, []).extend(values)
+            with self._lock:
+                usage = self._usage.setdefault(pid, {"tasks": 0, "images": 0, "busy_seconds": 0.0})
+                usage["tasks"] += 1
+                usage["images"] += len(part)
+                usage["busy_seconds"] += busy_seconds
+        return outputs
+
+    def stats(self) -> dict:
+        uptime = max(time.perf_counter() - self._started, 1e-9)
+        with self._lock:
+            per_worker = {
+                str(pid): {
+                    "tasks": usage["tasks"],
+                    "images": usage["images"],
+                    "busy_seconds": round(usage["busy_seconds"], 2),
+                    "utilization": round(min(usage["busy_seconds"] / uptime, 1.0), 3),
+                    "images_per_busy_second": round(usage["images"] / usage["busy_seconds"], 2)
+                    if usage["busy_seconds"] > 0 else 0.0
+                }
+                for pid, usage in self._usage.items()
+            }
+        return {
+            "workers": self.workers,
+            "threads_per_worker": self.threads_per_worker,
+            "uptime_seconds": round(uptime, 1),
+            "per_worker": per_worker
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
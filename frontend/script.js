@@ -239,7 +239,8 @@ detectSingleBtn.addEventListener('click', async () => {
 function displaySingleResults(result, processingTime) {
     // Display images
     document.getElementById('original-img').src = URL.createObjectURL(singleFileInput.files[0]);
-    document.getElementById('detected-img').src = `${API_BASE_URL}${result.annotated_image}?t=${Date.now()}`;
+    // Content-addressed path: safe for the browser to cache
+    document.getElementById('detected-img').src = `${API_BASE_URL}${result.annotated_image}`;
 
     // Update stats with REAL metrics from backend
     document.getElementById('total-detections').textContent = result.detections_count;
@@ -286,7 +287,7 @@ function displaySingleResults(result, processingTime) {
                     <div class="confidence-fill" style="width: ${det.confidence * 100}%"></div>
                 </div>
             </td>
-            <td>${det.bbox.join(', ')}</td>
+            <td>${det.bbox.map(Math.round).join(', ')}</td>
         `;
         tableBody.appendChild(row);
     });
@@ -349,7 +350,8 @@ detectBatchBtn.addEventListener('click', async () => {
             const controller = new AbortController();
             const timeoutId = setTimeout(() => controller.abort(), 10 * 60 * 1000); // 10 min
 
-            const resp = await fetch(`${API_BASE_URL}/predict/batch-chunked`, {
+            // thumbnail=true: small annotated previews for the results grid
+            const resp = await fetch(`${API_BASE_URL}/predict/batch-chunked?thumbnail=true`, {
                 method: 'POST',
                 body: formData,
                 signal: controller.signal
@@ -417,10 +419,13 @@ function displayBatchResults(result, processingTime) {
 
     result.images.forEach((imgResult, index) => {
         const file = batchFilesInput.files[index];
+        const imageSrc = imgResult.thumbnail_image
+            ? `${API_BASE_URL}${imgResult.thumbnail_image}`
+            : URL.createObjectURL(file);
         const imageItem = document.createElement('div');
         imageItem.className = 'batch-image-item';
         imageItem.innerHTML = `
-            <img src="${URL.createObjectURL(file)}" alt="${imgResult.filename}">
+            <img src="${imageSrc}" alt="${imgResult.filename}" loading="lazy">
             <div class="batch-image-info">
                 <strong>${imgResult.filename}</strong>
                 <div>Detections: ${imgResult.detections_count}</div>